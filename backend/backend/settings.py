@@ -161,3 +161,75 @@ AUTH_USER_MODEL = "edubuddy.EduBuddyUser"
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
+
+# Load the embedding model and open the Chroma store when the worker starts,
+# instead of on the first chatbot message
+EMBEDDINGS_WARM_ON_STARTUP = env.bool("EMBEDDINGS_WARM_ON_STARTUP", default=False)
+
+# create_database embeds chunks in batches of this size, optionally in a pool of processes
+EMBEDDING_BATCH_SIZE = env.int("EMBEDDING_BATCH_SIZE", default=64)
+EMBEDDING_WORKERS = env.int("EMBEDDING_WORKERS", default=0)
+
+# Processes used to OCR scanned PDF pages in parallel (1 OCRs in the request thread)
+OCR_WORKERS = env.int("OCR_WORKERS", default=min(4, os.cpu_count() or 1))
+
+# "openai" for gpt-4o, "fake" for a local model that replays CHATBOT_FAKE_RESPONSE (tests, offline dev)
+CHATBOT_MODEL_BACKEND = env("CHATBOT_MODEL_BACKEND", default="openai")
+CHATBOT_FAKE_RESPONSE = env("CHATBOT_FAKE_RESPONSE", default="This is a response from the fake chatbot model.")
+
+# Shared OpenAI client used by the chatbot, quiz generation and TTS. OPENAI_BASE_URL can point
+# at a local stub server in tests; requests are retried OPENAI_MAX_RETRIES times with jittered backoff
+OPENAI_API_KEY = env("OPENAI_API_KEY", default="")
+OPENAI_BASE_URL = env("OPENAI_BASE_URL", default="")
+OPENAI_MAX_CONNECTIONS = env.int("OPENAI_MAX_CONNECTIONS", default=20)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = env.int("OPENAI_MAX_KEEPALIVE_CONNECTIONS", default=10)
+OPENAI_KEEPALIVE_EXPIRY = env.float("OPENAI_KEEPALIVE_EXPIRY", default=30.0)
+OPENAI_CONNECT_TIMEOUT = env.float("OPENAI_CONNECT_TIMEOUT", default=5.0)
+OPENAI_READ_TIMEOUT = env.float("OPENAI_READ_TIMEOUT", default=60.0)
+OPENAI_WRITE_TIMEOUT = env.float("OPENAI_WRITE_TIMEOUT", default=30.0)
+OPENAI_POOL_TIMEOUT = env.float("OPENAI_POOL_TIMEOUT", default=10.0)
+OPENAI_MAX_RETRIES = env.int("OPENAI_MAX_RETRIES", default=3)
+
+# Synthesized speech is cached on disk by a hash of its text, voice, instructions and model;
+# least recently played files are deleted above TTS_CACHE_MAX_BYTES (0 disables the cache)
+TTS_CACHE_DIR = env("TTS_CACHE_DIR", default=str(BASE_DIR / "tts_cache"))
+TTS_CACHE_MAX_BYTES = env.int("TTS_CACHE_MAX_BYTES", default=500 * 1024 * 1024)
+
+# Long texts are synthesized as sentence segments of about TTS_SEGMENT_CHARS characters,
+# TTS_CONCURRENCY of them at a time, and streamed back in order
+TTS_SEGMENT_CHARS = env.int("TTS_SEGMENT_CHARS", default=600)
+TTS_CONCURRENCY = env.int("TTS_CONCURRENCY", default=3)
+# Chunks of 4 KiB a segment may buffer ahead of playback before its request waits
+TTS_SEGMENT_BUFFER_CHUNKS = env.int("TTS_SEGMENT_BUFFER_CHUNKS", default=256)
+
+# Rendered quiz result PDFs are kept in QUIZ_REPORT_CACHE_DIR (empty disables the cache);
+# a report is rendered in memory up to QUIZ_REPORT_SPOOL_BYTES, then in a temporary file
+QUIZ_REPORT_CACHE_DIR = env("QUIZ_REPORT_CACHE_DIR", default=str(BASE_DIR / "quiz_reports"))
+QUIZ_REPORT_SPOOL_BYTES = env.int("QUIZ_REPORT_SPOOL_BYTES", default=1024 * 1024)
+
+# Bulk quiz result exports render PDFs in a pool of QUIZ_EXPORT_WORKERS processes (1 renders
+# in the request) and read results from the database QUIZ_EXPORT_CHUNK_SIZE at a time
+QUIZ_EXPORT_WORKERS = env.int("QUIZ_EXPORT_WORKERS", default=min(4, os.cpu_count() or 1))
+QUIZ_EXPORT_CHUNK_SIZE = env.int("QUIZ_EXPORT_CHUNK_SIZE", default=100)
+
+# Recent conversation turns sent with each chatbot question; when they outgrow the budget,
+# the older ones (down to half the budget) are folded into a rolling summary of at most
+# CHATBOT_HISTORY_SUMMARY_WORDS words stored on the Conversation, MAX_MESSAGES per model call
+CHATBOT_HISTORY_TOKEN_BUDGET = env.int("CHATBOT_HISTORY_TOKEN_BUDGET", default=1500)
+CHATBOT_HISTORY_MAX_MESSAGES = env.int("CHATBOT_HISTORY_MAX_MESSAGES", default=100)
+CHATBOT_HISTORY_SUMMARY_WORDS = env.int("CHATBOT_HISTORY_SUMMARY_WORDS", default=200)
+
+# Reuse chatbot answers for questions whose embedding is at least SEMANTIC_CACHE_THRESHOLD
+# cosine-similar to an earlier one; entries are dropped whenever the index changes
+SEMANTIC_CACHE_ENABLED = env.bool("SEMANTIC_CACHE_ENABLED", default=False)
+SEMANTIC_CACHE_THRESHOLD = env.float("SEMANTIC_CACHE_THRESHOLD", default=0.95)
+SEMANTIC_CACHE_MAX_ENTRIES = env.int("SEMANTIC_CACHE_MAX_ENTRIES", default=1000)
+SEMANTIC_CACHE_TTL = env.int("SEMANTIC_CACHE_TTL", default=60 * 60 * 24)
+
+# Material ingestion: threads in the web process that work through the queue whenever a
+# material is uploaded (0 leaves everything to `manage.py process_ingestion_jobs`), default
+# pool size of that command, and seconds after which a running job is considered abandoned
+# and queued again
+INGESTION_INLINE_WORKERS = env.int("INGESTION_INLINE_WORKERS", default=2)
+INGESTION_WORKERS = env.int("INGESTION_WORKERS", default=2)
+INGESTION_JOB_TIMEOUT = env.int("INGESTION_JOB_TIMEOUT", default=1800)
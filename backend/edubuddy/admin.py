@@ -1,9 +1,10 @@
 from django.contrib import admin
-from .models import EduBuddyUser, Role, Material, Quiz, Question
+from .models import EduBuddyUser, Role, Material, Quiz, Question, IngestionJob
 
 admin.site.register(EduBuddyUser)
 admin.site.register(Role)
 admin.site.register(Material)
+admin.site.register(IngestionJob)
 admin.site.register(Quiz)
 admin.site.register(Question)
 # Register your models here.
\ No newline at end of file
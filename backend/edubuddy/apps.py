@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class EduBuddyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'edubuddy'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if getattr(settings, "EMBEDDINGS_WARM_ON_STARTUP", False):
+            from edubuddy.management.commands.get_embedding_function import registry
+            registry.warm_up()
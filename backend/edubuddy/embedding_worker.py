@@ -0,0 +1,15 @@
+# Runs inside ProcessPoolExecutor workers, so it must stay importable without Django being set up
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from edubuddy.management.commands.get_embedding_function import EMBEDDING_MODEL_NAME
+
+_embedding_function = None
+
+
+def init_worker():
+    global _embedding_function
+    _embedding_function = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+
+def embed_texts(texts):
+    return _embedding_function.embed_documents(texts)
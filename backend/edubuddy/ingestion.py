@@ -0,0 +1,123 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import IngestionJob, Material
+
+logger = logging.getLogger(__name__)
+
+_inline_executor = None
+_inline_executor_lock = threading.Lock()
+
+
+def _get_inline_executor():
+    global _inline_executor
+    with _inline_executor_lock:
+        if _inline_executor is None:
+            _inline_executor = ThreadPoolExecutor(
+                max_workers=settings.INGESTION_INLINE_WORKERS,
+                thread_name_prefix="ingestion",
+            )
+        return _inline_executor
+
+
+def enqueue_material(material):
+    job = IngestionJob.objects.create(material=material)
+    Material.objects.filter(pk=material.pk).update(
+        is_processed=False,
+        processing_status="queued",
+        processing_error="",
+        processing_started_at=None,
+        processing_finished_at=None,
+    )
+
+    if settings.INGESTION_INLINE_WORKERS:
+        transaction.on_commit(lambda: _get_inline_executor().submit(_drain_queue_in_thread))
+
+    return job
+
+
+def claim_next_job():
+    with transaction.atomic():
+        job = (
+            IngestionJob.objects.select_for_update(skip_locked=True)
+            .filter(status="queued")
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        now = timezone.now()
+        job.status = "running"
+        job.started_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "started_at", "attempts"])
+
+        Material.objects.filter(pk=job.material_id).update(
+            processing_status="running",
+            processing_error="",
+            processing_started_at=now,
+            processing_finished_at=None,
+        )
+    return job
+
+
+def run_job(job, stdout=None):
+    try:
+        call_command("create_database", material=job.material_id, stdout=stdout)
+    except Exception as e:
+        _finish_job(job, "failed", str(e))
+    else:
+        _finish_job(job, "done")
+    return job
+
+
+def requeue_stale_jobs(timeout_seconds):
+    """Put back jobs whose worker died while running them."""
+    stale_before = timezone.now() - timedelta(seconds=timeout_seconds)
+    stale_jobs = IngestionJob.objects.filter(status="running", started_at__lt=stale_before)
+    material_ids = list(stale_jobs.values_list("material_id", flat=True))
+
+    requeued = stale_jobs.update(status="queued", started_at=None)
+    Material.objects.filter(pk__in=material_ids).update(processing_status="queued", processing_started_at=None)
+    return requeued
+
+
+def _finish_job(job, status, error=""):
+    now = timezone.now()
+    IngestionJob.objects.filter(pk=job.pk).update(status=status, error=error, finished_at=now)
+    # Filtered updates so a material deleted while it was being indexed is not resurrected
+    Material.objects.filter(pk=job.material_id).update(
+        is_processed=status == "done",
+        processing_status=status,
+        processing_error=error,
+        processing_finished_at=now,
+    )
+    job.status = status
+    job.error = error
+    job.finished_at = now
+
+
+def _drain_queue_in_thread():
+    """
+    Run queued jobs until the queue is empty.
+
+    Every upload submits one of these, but any of them may pick up any job, so each one
+    keeps going instead of running a single job; jobs left running by a web process that
+    died are put back first.
+    """
+    try:
+        requeue_stale_jobs(settings.INGESTION_JOB_TIMEOUT)
+        while (job := claim_next_job()) is not None:
+            run_job(job)
+    except Exception:
+        logger.exception("Inline ingestion failed")
+    finally:
+        connection.close()
@@ -1,15 +1,21 @@
+import glob
 import os
 import shutil
+import time
 
-from django.core.management.base import BaseCommand
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from langchain_community.document_loaders import PyPDFLoader
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
 
-from edubuddy.management.commands.get_embedding_function import get_embedding_function
+from edubuddy import embedding_worker
+from edubuddy.management.commands.get_embedding_function import CHROMA_PATH, get_embedding_function, \
+    get_vector_store, get_collection, reload_vector_store, bump_index_version
+from edubuddy.material_text import get_material_pages
+from edubuddy.models import Material
+from edubuddy.utils import file_content_hash, ordered_results, spawn_pool
 
-CHROMA_PATH = "chroma"
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
 DATA_PATH = os.path.join(BASE_DIR, "data")
 
@@ -19,34 +25,165 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--reset", action="store_true", help="Reset the database.")
+        parser.add_argument("--material", type=int, help="Index only the file of the material with this ID.")
+        parser.add_argument("--remove", type=int, metavar="MATERIAL_ID",
+                            help="Remove only the chunks of the material with this ID.")
+        parser.add_argument("--source", metavar="PATH",
+                            help="With --remove, also remove chunks indexed from this file.")
+        parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE,
+                            help="Number of chunks embedded and written to Chroma at a time.")
+        parser.add_argument("--workers", type=int, default=settings.EMBEDDING_WORKERS,
+                            help="Embed batches in this many processes (0 embeds in this process).")
 
     def handle(self, *args, **options):
         self.stdout.write("Starting script...")
-        self.stdout.write(f"DATA_PATH is: {DATA_PATH}")
+        self.batch_size = max(1, options["batch_size"])
+        self.workers = options["workers"]
+        self.executor = None
+        try:
+            self.run(options)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
 
+    def run(self, options):
         if options["reset"]:
             self.clear_database()
+
+        if options["remove"]:
+            self.remove_material(options["remove"], options["source"])
+            return
+
+        if options["material"]:
+            self.index_material(options["material"])
+            return
+
+        self.stdout.write(f"DATA_PATH is: {DATA_PATH}")
         self.generate_data_store()
 
     def clear_database(self):
         self.stdout.write("✨ Clearing Database")
+        reload_vector_store()
         if os.path.exists(CHROMA_PATH):
             shutil.rmtree(CHROMA_PATH)
+        bump_index_version()
 
     def generate_data_store(self):
-        documents = self.load_documents()
+        for path in sorted(glob.glob(os.path.join(DATA_PATH, "**", "*.pdf"), recursive=True)):
+            try:
+                self.index_file(path)
+            except Exception as e:
+                self.stdout.write(f"Error loading {path}: {e}")
+
+    def index_material(self, material_id):
+        try:
+            material = Material.objects.get(pk=material_id)
+        except Material.DoesNotExist:
+            raise CommandError(f"Material {material_id} does not exist.")
+
+        if not material.file or not os.path.isfile(material.file.path):
+            raise CommandError(f"File for material {material_id} does not exist.")
+
+        content_hash = self.index_file(
+            material.file.path,
+            {"material_id": material.id},
+            load_pages=lambda file_hash: get_material_pages(material, file_hash),
+        )
+
+        # The material may have been deleted while it was being indexed; its chunks were
+        # removed then, so drop the ones written since
+        if not Material.objects.filter(pk=material_id).exists():
+            self.stdout.write(f"Material {material_id} was deleted during indexing")
+            self.remove_material(material_id)
+            return
+
+        # An unchanged file is not loaded again, but its text may predate the MaterialText cache
+        get_material_pages(material, content_hash)
+
+        if material.content_hash != content_hash:
+            material.content_hash = content_hash
+            material.save(update_fields=["content_hash"])
+
+    def remove_material(self, material_id, source=None):
+        db = get_vector_store()
+
+        where = {"material_id": material_id}
+        if source is None:
+            material = Material.objects.filter(pk=material_id).first()
+            if material and material.file:
+                source = material.file.path
+        if source:
+            # Chunks indexed from the data folder have no material_id, only the source path
+            where = {"$or": [where, {"source": os.path.abspath(source)}]}
+
+        if not self.delete_chunks(db, where):
+            self.stdout.write(f"✅ No chunks found for material {material_id}")
+
+    def index_file(self, path, extra_metadata=None, load_pages=None):
+        """
+        Load, split and embed one PDF, unless its content hash is already indexed.
+
+        `load_pages(content_hash)` can supply the page texts (e.g. from the material's
+        extracted text cache) instead of parsing the file with PyPDF.
+        """
+        source = os.path.abspath(path)
+        content_hash = file_content_hash(source)
+        db = get_vector_store()
+
+        if self.is_indexed(db, source, content_hash):
+            self.stdout.write(f"✅ {source} is unchanged")
+            return content_hash
+
+        if load_pages is not None:
+            documents = [
+                Document(page_content=page_text, metadata={"page": page})
+                for page, page_text in enumerate(load_pages(content_hash))
+                if page_text
+            ]
+        else:
+            documents = self.load_documents(source)
+        for document in documents:
+            document.metadata.update(extra_metadata or {})
+            document.metadata["source"] = source
+            document.metadata["content_hash"] = content_hash
+
         chunks = self.split_documents(documents)
+        for chunk in chunks:
+            # Lets is_indexed tell a complete index from one a crashed run left half written
+            chunk.metadata["chunk_count"] = len(chunks)
+
+        # Drop chunks of a previous version of this file before adding the new ones
+        self.delete_chunks(db, {"source": source})
         self.save_to_chroma(chunks)
+        return content_hash
 
-    def load_documents(self):
-        try:
-            document_loader = PyPDFDirectoryLoader(DATA_PATH)
-            documents = document_loader.load()
-            self.stdout.write(f"Loaded {len(documents)} documents from {DATA_PATH}")
-            return documents
-        except Exception as e:
-            self.stdout.write(f"Error loading documents: {e}")
-            return []
+    def is_indexed(self, db, source, content_hash):
+        existing_items = db.get(where={"source": source}, limit=1, include=["metadatas"])
+        if not existing_items["metadatas"]:
+            return False
+
+        metadata = existing_items["metadatas"][0]
+        if metadata.get("content_hash") != content_hash or "chunk_count" not in metadata:
+            return False
+
+        stored_ids = db.get(where={"source": source}, include=[])["ids"]
+        return len(stored_ids) == metadata["chunk_count"]
+
+    def delete_chunks(self, db, where):
+        existing_items = db.get(where=where, include=[])
+        if not existing_items["ids"]:
+            return 0
+
+        self.stdout.write(f"🗑 Removing {len(existing_items['ids'])} chunks")
+        db.delete(ids=existing_items["ids"])
+        bump_index_version()
+        return len(existing_items["ids"])
+
+    def load_documents(self, path):
+        document_loader = PyPDFLoader(path)
+        documents = document_loader.load()
+        self.stdout.write(f"Loaded {len(documents)} documents from {path}")
+        return documents
 
     def split_documents(self, documents: list[Document]):
         text_splitter = RecursiveCharacterTextSplitter(
@@ -61,27 +198,67 @@ class Command(BaseCommand):
         return chunks
 
     def save_to_chroma(self, chunks: list[Document]):
-        db = Chroma(
-            persist_directory=CHROMA_PATH, embedding_function=get_embedding_function()
-        )
+        if not chunks:
+            self.stdout.write("✅ No new documents to add")
+            return
+
+        db = get_vector_store()
 
         chunks_with_ids = self.calculate_chunk_ids(chunks)
 
-        existing_items = db.get(include=[])
+        existing_items = db.get(ids=[chunk.metadata["id"] for chunk in chunks_with_ids], include=[])
         existing_ids = set(existing_items["ids"])
-        self.stdout.write(f"Number of existing documents in DB: {len(existing_ids)}")
+        self.stdout.write(f"Number of existing chunks in DB: {len(existing_ids)}")
 
         new_chunks = []
         for chunk in chunks_with_ids:
             if chunk.metadata["id"] not in existing_ids:
                 new_chunks.append(chunk)
 
-        if len(new_chunks):
-            self.stdout.write(f"👉 Adding new documents: {len(new_chunks)}")
-            new_chunk_ids = [chunk.metadata["id"] for chunk in new_chunks]
-            db.add_documents(new_chunks, ids=new_chunk_ids)
-        else:
+        if not len(new_chunks):
             self.stdout.write("✅ No new documents to add")
+            return
+
+        self.stdout.write(f"👉 Adding new documents: {len(new_chunks)}")
+        started_at = time.perf_counter()
+        added = 0
+
+        # Each batch is written as soon as it is embedded, so only a few batches of vectors are held at once
+        collection = get_collection()
+        for batch, embeddings in self.embed_batches(new_chunks):
+            collection.upsert(
+                ids=[chunk.metadata["id"] for chunk in batch],
+                embeddings=embeddings,
+                metadatas=[chunk.metadata for chunk in batch],
+                documents=[chunk.page_content for chunk in batch],
+            )
+            added += len(batch)
+            elapsed = time.perf_counter() - started_at
+            self.stdout.write(f"   {added}/{len(new_chunks)} chunks ({added / elapsed:.1f} chunks/s)")
+
+        bump_index_version()
+
+    def embed_batches(self, chunks):
+        batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+
+        if self.workers <= 1 or len(batches) == 1:
+            embedding_function = get_embedding_function()
+            for batch in batches:
+                yield batch, embedding_function.embed_documents([chunk.page_content for chunk in batch])
+            return
+
+        executor = self.get_executor()
+        yield from ordered_results(
+            batches,
+            lambda batch: executor.submit(embedding_worker.embed_texts, [chunk.page_content for chunk in batch]),
+            self.workers,
+        )
+
+    def get_executor(self):
+        # One pool for the whole run, so each worker loads the model only once
+        if self.executor is None:
+            self.executor = spawn_pool(self.workers, initializer=embedding_worker.init_worker)
+        return self.executor
 
     def calculate_chunk_ids(self, chunks):
         last_page_id = None
@@ -0,0 +1,62 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from edubuddy.quiz_export import EXPORT_FORMATS, export_queryset, iter_csv, iter_zip
+from edubuddy.utils import spawn_pool
+
+
+class Command(BaseCommand):
+    help = "Export quiz results as a ZIP of PDF reports or a CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write the export to.")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="zip",
+                            help="zip with one PDF per result, or csv with one row per answered question.")
+        parser.add_argument("--users", type=int, nargs="+", metavar="USER_ID", help="Only these users.")
+        parser.add_argument("--quizzes", type=int, nargs="+", metavar="QUIZ_ID", help="Only these quizzes.")
+        parser.add_argument("--from", dest="submitted_from", type=self.parse_date,
+                            help="Only results submitted on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="submitted_to", type=self.parse_date,
+                            help="Only results submitted on or before this date (YYYY-MM-DD).")
+        parser.add_argument("--workers", type=int, default=settings.QUIZ_EXPORT_WORKERS,
+                            help="Render PDFs in this many processes (1 renders in this process).")
+
+    def handle(self, *args, **options):
+        results = export_queryset(
+            user_ids=options["users"],
+            quiz_ids=options["quizzes"],
+            submitted_from=options["submitted_from"],
+            submitted_to=options["submitted_to"],
+        )
+        count = results.count()
+        self.stdout.write(f"👉 Exporting {count} quiz results to {options['output']}")
+
+        started_at = time.perf_counter()
+        executor = None
+        try:
+            if options["format"] == "csv":
+                chunks = iter_csv(results)
+            else:
+                if options["workers"] > 1:
+                    executor = spawn_pool(options["workers"])
+                chunks = iter_zip(results, executor, options["workers"])
+
+            with open(options["output"], "wb") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(self.style.SUCCESS(f"✅ Exported {count} quiz results in {elapsed:.1f}s"))
+
+    @staticmethod
+    def parse_date(value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}, use YYYY-MM-DD.")
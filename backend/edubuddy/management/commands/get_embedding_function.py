@@ -1,9 +1,166 @@
+import logging
+import os
+import resource
+import threading
+import time
+import uuid
+
+import chromadb
+from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
+CHROMA_PATH = "chroma"
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+INDEX_VERSION_FILE = "index_version"
+# langchain's default collection name, which the existing stores were created with
+COLLECTION_NAME = "langchain"
+
+logger = logging.getLogger(__name__)
+
+
+def _resident_memory_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak RSS in KB on Linux, which is the best we have elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class VectorStoreRegistry:
+    """
+    Process-wide holder for the embedding model and the Chroma client.
+
+    Both are created lazily on first use and shared by every caller in the
+    process, so the SentenceTransformer is loaded from disk only once per worker.
+    """
+
+    def __init__(self, persist_directory=CHROMA_PATH, model_name=EMBEDDING_MODEL_NAME):
+        self.persist_directory = persist_directory
+        self.model_name = model_name
+        self._lock = threading.RLock()
+        self._embedding_function = None
+        self._client = None
+        self._vector_store = None
+        self._loaded_index_version = None
+        self._stats = {
+            "embedding_load_seconds": None,
+            "vector_store_load_seconds": None,
+            "resident_memory_mb": None,
+            "vector_store_reloads": 0,
+        }
+
+    def get_embedding_function(self):
+        if self._embedding_function is None:
+            with self._lock:
+                if self._embedding_function is None:
+                    started_at = time.perf_counter()
+                    self._embedding_function = HuggingFaceEmbeddings(model_name=self.model_name)
+                    self._record_load("embedding_load_seconds", started_at)
+        return self._embedding_function
+
+    def get_vector_store(self):
+        index_version = self.get_index_version()
+        if self._vector_store is not None and self._loaded_index_version != index_version:
+            # The store was changed by another process (e.g. create_database), reopen it
+            self.reload_vector_store()
+
+        if self._vector_store is None:
+            embedding_function = self.get_embedding_function()
+            with self._lock:
+                if self._vector_store is None:
+                    started_at = time.perf_counter()
+                    self._client = chromadb.PersistentClient(path=self.persist_directory)
+                    self._vector_store = Chroma(
+                        client=self._client,
+                        collection_name=COLLECTION_NAME,
+                        embedding_function=embedding_function,
+                    )
+                    self._loaded_index_version = index_version
+                    self._record_load("vector_store_load_seconds", started_at)
+        return self._vector_store
+
+    def get_collection(self):
+        """The chromadb collection behind the vector store, for writes with precomputed embeddings."""
+        # Under the lock, so a concurrent reload_vector_store cannot drop the client in between
+        with self._lock:
+            self.get_vector_store()
+            return self._client.get_or_create_collection(COLLECTION_NAME, embedding_function=None)
+
+    def get_index_version(self):
+        try:
+            with open(os.path.join(self.persist_directory, INDEX_VERSION_FILE)) as version_file:
+                return version_file.read().strip()
+        except OSError:
+            return ""
+
+    def bump_index_version(self):
+        """Mark the store as changed so every process reopens it on next use."""
+        os.makedirs(self.persist_directory, exist_ok=True)
+        index_version = uuid.uuid4().hex
+        with open(os.path.join(self.persist_directory, INDEX_VERSION_FILE), "w") as version_file:
+            version_file.write(index_version)
+        with self._lock:
+            self._loaded_index_version = index_version
+        return index_version
+
+    def reload_vector_store(self):
+        """Drop the cached Chroma client so the next caller reopens the (rebuilt) store."""
+        with self._lock:
+            self._client = None
+            self._vector_store = None
+            self._loaded_index_version = None
+            self._stats["vector_store_reloads"] += 1
+            try:
+                from chromadb.api.client import SharedSystemClient
+                SharedSystemClient.clear_system_cache()
+            except ImportError:
+                pass
+
+    def warm_up(self):
+        self.get_vector_store()
+        return self.stats()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["embedding_loaded"] = self._embedding_function is not None
+        stats["vector_store_loaded"] = self._vector_store is not None
+        stats["index_version"] = self._loaded_index_version
+        stats["resident_memory_mb"] = round(_resident_memory_mb(), 1)
+        return stats
+
+    def _record_load(self, key, started_at):
+        elapsed = time.perf_counter() - started_at
+        self._stats[key] = round(elapsed, 3)
+        self._stats["resident_memory_mb"] = round(_resident_memory_mb(), 1)
+        logger.info("%s: %.2fs, resident memory: %s MB",
+                    key.replace("_", " "), elapsed, self._stats["resident_memory_mb"])
+
+
+registry = VectorStoreRegistry()
+
 
 def get_embedding_function():
-    hf_embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-    )
+    return registry.get_embedding_function()
+
+
+def get_vector_store():
+    return registry.get_vector_store()
+
+
+def get_collection():
+    return registry.get_collection()
+
+
+def reload_vector_store():
+    registry.reload_vector_store()
+
+
+def get_index_version():
+    return registry.get_index_version()
+
 
-    return hf_embeddings
+def bump_index_version():
+    return registry.bump_index_version()
@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from edubuddy.ingestion import claim_next_job, run_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued material ingestion jobs with a pool of workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.INGESTION_WORKERS,
+                            help="Number of materials to ingest in parallel.")
+        parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="Seconds to wait before checking an empty queue again.")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+
+        requeued = requeue_stale_jobs(settings.INGESTION_JOB_TIMEOUT)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+
+        self.stdout.write(f"Processing ingestion jobs with {workers} workers...")
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingestion") as executor:
+            while True:
+                while len(running) < workers:
+                    job = claim_next_job()
+                    if job is None:
+                        break
+                    self.stdout.write(f"👉 Ingesting material {job.material_id} (job {job.id})")
+                    running.add(executor.submit(self.run_job, job))
+
+                if running:
+                    _, running = wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["poll_interval"])
+
+        self.stdout.write(self.style.SUCCESS("Ingestion queue is empty"))
+
+    def run_job(self, job):
+        started_at = time.perf_counter()
+        try:
+            run_job(job)
+        finally:
+            connection.close()
+
+        elapsed = time.perf_counter() - started_at
+        if job.status == "done":
+            self.stdout.write(self.style.SUCCESS(f"✅ Material {job.material_id} ingested in {elapsed:.1f}s"))
+        else:
+            self.stdout.write(self.style.ERROR(f"Material {job.material_id} failed after {elapsed:.1f}s: {job.error}"))
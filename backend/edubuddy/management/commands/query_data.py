@@ -1,27 +1,46 @@
 # edubuddy/utils.py
-import os
+import asyncio
+
+from asgiref.sync import sync_to_async
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from edubuddy.management.commands.get_embedding_function import get_embedding_function
-from langchain_chroma import Chroma
+from django.conf import settings
+from langchain_core.language_models import FakeListChatModel
+from edubuddy.management.commands.get_embedding_function import get_embedding_function, get_vector_store, \
+    get_index_version
+from edubuddy.openai_clients import get_chat_openai
+from edubuddy.semantic_cache import get_semantic_cache
 
 # Load environment variables
 load_dotenv()
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-
-CHROMA_PATH = "chroma"
 
 PROMPT_TEMPLATE = """
 Hello! I'm your friendly AI assistant here to help you learn. I will answer your question **ONLY** based on the following context:
 
 {context}
 
-I will do my best to provide a clear and helpful answer. If I can't find the answer directly in the context, I'll guide you using the information available.  
+{history}I will do my best to provide a clear and helpful answer. If I can't find the answer directly in the context, I'll guide you using the information available.  
 
 Now, let's dive into your question: {question}
 """
 
+HISTORY_TEMPLATE = """Here is what we have talked about so far:
+
+{summary}{recent_messages}
+
+"""
+
+SUMMARY_PROMPT_TEMPLATE = """
+Summarize the conversation between a student and the EduBuddy tutor below in at most {max_words} words.
+Keep the topics, facts and open questions that later answers may need to refer to.
+
+Summary so far:
+{summary}
+
+New messages:
+{messages}
+"""
+
 
 class Request(BaseModel):
     message: str
@@ -31,32 +50,264 @@ class ActionResponse(BaseModel):
     response: str
 
 
-def query_rag(query_text: str) -> str:
+NO_CONTEXT_RESPONSE = "I don't know"
+
+
+def query_rag(query_text: str, conversation=None, before_message_id=None) -> str:
+    history = build_history(conversation, before_message_id)
+    query_embedding = get_embedding_function().embed_query(query_text)
+
+    # Answers that depend on earlier turns are not reusable for other students
+    cached_response = get_cached_response(query_embedding) if not history else None
+    if cached_response is not None:
+        return cached_response
+
+    prompt = build_prompt(query_text, query_embedding, history)
+    if prompt is None:
+        return NO_CONTEXT_RESPONSE
+
+    try:
+        response = invoke_model(prompt)
+    except Exception as e:
+        return f"Error: No valid response. {str(e)}"
+
+    if not history:
+        cache_response(query_embedding, response)
+    return response
+
+
+def stream_rag(query_text: str, conversation=None, before_message_id=None):
+    history = build_history(conversation, before_message_id)
+    query_embedding = get_embedding_function().embed_query(query_text)
+
+    cached_response = get_cached_response(query_embedding) if not history else None
+    if cached_response is not None:
+        yield cached_response
+        return
+
+    prompt = build_prompt(query_text, query_embedding, history)
+    if prompt is None:
+        yield NO_CONTEXT_RESPONSE
+        return
+
+    tokens = []
+    for token in stream_response(prompt):
+        tokens.append(token)
+        yield token
+
+    if not history:
+        cache_response(query_embedding, "".join(tokens))
+
+
+async def aquery_rag(query_text: str, conversation=None, before_message_id=None) -> str:
+    """
+    Async variant of query_rag for ASGI views.
+
+    Embedding and Chroma search are CPU/disk bound and run in the default executor,
+    history goes through the ORM in a thread and the model calls are awaited.
+    """
+    loop = asyncio.get_running_loop()
+
+    history = await abuild_history(conversation, before_message_id)
+    query_embedding = await loop.run_in_executor(None, embed_query, query_text)
+
+    cached_response = get_cached_response(query_embedding) if not history else None
+    if cached_response is not None:
+        return cached_response
+
+    prompt = await loop.run_in_executor(None, build_prompt, query_text, query_embedding, history)
+    if prompt is None:
+        return NO_CONTEXT_RESPONSE
+
+    try:
+        response = await ainvoke_model(prompt)
+    except Exception as e:
+        return f"Error: No valid response. {str(e)}"
+
+    if not history:
+        cache_response(query_embedding, response)
+    return response
+
+
+def embed_query(query_text: str):
+    return get_embedding_function().embed_query(query_text)
+
+
+def build_prompt(query_text: str, query_embedding=None, history=""):
     # Prepare the DB
-    embedding_function = get_embedding_function()
-    db = Chroma(
-        persist_directory=CHROMA_PATH,
-        embedding_function=embedding_function,
-    )
+    db = get_vector_store()
 
     # Search the DB
-    results = db.similarity_search_with_score(query_text, k=3)
+    if query_embedding is None:
+        query_embedding = get_embedding_function().embed_query(query_text)
+    results = db.similarity_search_by_vector_with_relevance_scores(query_embedding, k=3)
 
     if not results:
-        return "I don't know"
+        return None
 
     context_text = "\n".join([doc.page_content for doc, _ in results])
 
-    prompt = PROMPT_TEMPLATE.format(context=context_text, question=query_text)
+    return PROMPT_TEMPLATE.format(context=context_text, history=history, question=query_text)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text, good enough for budgeting
+    return len(text) // 4 + 1
+
 
-    return generate_response(prompt)
+def format_messages(messages) -> str:
+    return "\n".join(
+        f"{'Student' if message.sender == 'user' else 'EduBuddy'}: {message.message}" for message in messages
+    )
+
+
+def build_history(conversation, before_message_id=None) -> str:
+    """
+    Return the prompt section with the conversation so far, or "" for a new conversation.
+
+    The newest messages are included verbatim up to CHATBOT_HISTORY_TOKEN_BUDGET tokens.
+    Older messages are folded into Conversation.summary, which is extended only with the
+    messages that have just left the window, so it is never recomputed from scratch.
+    """
+    if conversation is None:
+        return ""
+
+    window, evicted = get_history_window(conversation, before_message_id)
+    if evicted:
+        update_summary(conversation, evicted)
+    return format_history(conversation, window)
+
+
+async def abuild_history(conversation, before_message_id=None) -> str:
+    """Async variant of build_history; the summary model call is awaited, not run in a thread."""
+    if conversation is None:
+        return ""
+
+    window, evicted = await sync_to_async(get_history_window)(conversation, before_message_id)
+    if evicted:
+        await aupdate_summary(conversation, evicted)
+    return format_history(conversation, window)
+
+
+def get_history_window(conversation, before_message_id=None):
+    """
+    Split the unsummarized messages into (window, evicted), both oldest first.
+
+    `window` holds the newest messages while they fit in CHATBOT_HISTORY_TOKEN_BUDGET.
+    Once they do not, it is cut back to half the budget, so the summary is extended
+    every few turns instead of on each one. `evicted` are the oldest messages outside
+    the window, at most CHATBOT_HISTORY_MAX_MESSAGES of them; a longer backlog is folded
+    into the summary a page at a time over the following turns.
+    """
+    messages = conversation.messages.filter(id__gt=conversation.summarized_until_id or 0)
+    if before_message_id is not None:
+        messages = messages.filter(id__lt=before_message_id)
+    messages = messages.only('id', 'sender', 'message')
 
+    max_messages = settings.CHATBOT_HISTORY_MAX_MESSAGES
+    budget = settings.CHATBOT_HISTORY_TOKEN_BUDGET
+    newest_first = list(messages.order_by('-id')[:max_messages + 1])
+    if len(newest_first) <= max_messages and sum(estimate_tokens(m.message) for m in newest_first) <= budget:
+        return list(reversed(newest_first)), []
 
-def generate_response(prompt: str) -> str:
+    window = []
+    used_tokens = 0
+    for message in newest_first[:max_messages]:
+        used_tokens += estimate_tokens(message.message)
+        if used_tokens > budget // 2:
+            break
+        window.append(message)
+
+    if window:
+        messages = messages.filter(id__lt=window[-1].id)
+    evicted = list(messages.order_by('id')[:max_messages])
+    return list(reversed(window)), evicted
+
+
+def format_history(conversation, window) -> str:
+    if not window and not conversation.summary:
+        return ""
+
+    summary = f"{conversation.summary}\n\n" if conversation.summary else ""
+    return HISTORY_TEMPLATE.format(summary=summary, recent_messages=format_messages(window))
+
+
+def summary_prompt(conversation, messages) -> str:
+    return SUMMARY_PROMPT_TEMPLATE.format(
+        max_words=settings.CHATBOT_HISTORY_SUMMARY_WORDS,
+        summary=conversation.summary or "(nothing yet)",
+        messages=format_messages(messages),
+    )
+
+
+def update_summary(conversation, messages):
     try:
-        model = ChatOpenAI(model="gpt-4o", temperature=0.2)
-        response = model.invoke([{"role": "system", "content": prompt}])
+        summary = invoke_model(summary_prompt(conversation, messages))
+    except Exception as e:
+        # Keep answering with the old summary, the messages are folded in on a later turn
+        print(f"Failed to update conversation summary: {e}")
+        return
+
+    save_summary(conversation, messages, summary)
 
-        return response.content
+
+async def aupdate_summary(conversation, messages):
+    try:
+        summary = await ainvoke_model(summary_prompt(conversation, messages))
     except Exception as e:
-        return f"Error: No valid response. {str(e)}"
+        print(f"Failed to update conversation summary: {e}")
+        return
+
+    await sync_to_async(save_summary)(conversation, messages, summary)
+
+
+def save_summary(conversation, messages, summary):
+    # Only one concurrent request may move the summary forward
+    updated = type(conversation).objects.filter(
+        pk=conversation.pk, summarized_until_id=conversation.summarized_until_id
+    ).update(summary=summary, summarized_until_id=messages[-1].id)
+
+    if updated:
+        conversation.summary = summary
+        conversation.summarized_until_id = messages[-1].id
+
+
+def get_cached_response(query_embedding):
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is None:
+        return None
+    return semantic_cache.lookup(query_embedding, get_index_version())
+
+
+def cache_response(query_embedding, response):
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None and response:
+        semantic_cache.store(query_embedding, get_index_version(), response)
+
+
+def get_chat_model():
+    if settings.CHATBOT_MODEL_BACKEND == "fake":
+        return FakeListChatModel(responses=[settings.CHATBOT_FAKE_RESPONSE])
+
+    return get_chat_openai(model="gpt-4o", temperature=0.2)
+
+
+def invoke_model(prompt: str) -> str:
+    model = get_chat_model()
+    response = model.invoke([{"role": "system", "content": prompt}])
+
+    return response.content
+
+
+async def ainvoke_model(prompt: str) -> str:
+    model = get_chat_model()
+    response = await model.ainvoke([{"role": "system", "content": prompt}])
+
+    return response.content
+
+
+def stream_response(prompt: str):
+    model = get_chat_model()
+    for chunk in model.stream([{"role": "system", "content": prompt}]):
+        if chunk.content:
+            yield chunk.content
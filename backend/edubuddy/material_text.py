@@ -0,0 +1,57 @@
+from .ingestion import enqueue_material
+from .models import Material, MaterialText
+from .pdf_text import iter_pdf_page_texts, join_pages
+from .utils import file_content_hash
+
+
+def get_material_pages(material, content_hash=None):
+    """
+    Return the text of every page of the material's PDF.
+
+    The text is extracted once per file content and stored in MaterialText, so quiz
+    generation and RAG ingestion of an unchanged file never parse the PDF again.
+    """
+    if content_hash is None:
+        content_hash = file_content_hash(material.file.path)
+
+    cached = MaterialText.objects.filter(material=material, content_hash=content_hash).first()
+    if cached is not None:
+        return cached.get_pages()
+
+    pages = list(iter_pdf_page_texts(material.file.path))
+
+    material_text = MaterialText(material=material, content_hash=content_hash)
+    material_text.set_pages(pages)
+    MaterialText.objects.update_or_create(
+        material=material,
+        defaults={
+            "content_hash": content_hash,
+            "page_count": material_text.page_count,
+            "pages": material_text.pages,
+        },
+    )
+
+    if material.content_hash != content_hash:
+        material.content_hash = content_hash
+        Material.objects.filter(pk=material.pk).update(content_hash=content_hash)
+
+    return pages
+
+
+def get_material_text(material, max_chars=None):
+    """
+    Return the material's text, up to about `max_chars` characters.
+
+    Uses the MaterialText cache when it is filled. Otherwise the PDF is read lazily and
+    only until `max_chars` is reached, so a long scan is not OCRed in full inside a
+    request, and the material is queued for ingestion, which fills the cache.
+    """
+    content_hash = file_content_hash(material.file.path)
+
+    cached = MaterialText.objects.filter(material=material, content_hash=content_hash).first()
+    if cached is not None:
+        return join_pages(cached.get_pages(), max_chars)
+
+    if not material.ingestion_jobs.filter(status__in=("queued", "running")).exists():
+        enqueue_material(material)
+    return join_pages(iter_pdf_page_texts(material.file.path), max_chars)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0012_alter_question_difficulty_conversation_chatmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
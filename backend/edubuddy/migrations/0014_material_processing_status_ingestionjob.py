@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_processed_materials_done(apps, schema_editor):
+    Material = apps.get_model('edubuddy', 'Material')
+    Material.objects.filter(is_processed=True).update(processing_status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0013_material_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='processing_status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='processing_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='processing_finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_processed_materials_done, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=15)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_jobs', to='edubuddy.material')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ingestion_job_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0014_material_processing_status_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('page_count', models.IntegerField()),
+                ('pages', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('material', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='extracted_text', to='edubuddy.material')),
+            ],
+        ),
+    ]
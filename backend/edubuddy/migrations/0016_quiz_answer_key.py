@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0015_materialtext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='answer_key',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
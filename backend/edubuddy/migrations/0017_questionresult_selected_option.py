@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0016_quiz_answer_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionresult',
+            name='selected_option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='edubuddy.answer'),
+        ),
+        migrations.AlterField(
+            model_name='questionresult',
+            name='selected_answer',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:30
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_quiz_difficulty(apps, schema_editor):
+    Quiz = apps.get_model('edubuddy', 'Quiz')
+    Question = apps.get_model('edubuddy', 'Question')
+    first_question = Question.objects.filter(quiz=OuterRef('pk')).order_by('id')
+    Quiz.objects.filter(difficulty='').update(
+        difficulty=Coalesce(Subquery(first_question.values('difficulty')[:1]), Value(''))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0017_questionresult_selected_option'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='difficulty',
+            field=models.CharField(blank=True, default='', max_length=15),
+        ),
+        migrations.RunPython(backfill_quiz_difficulty, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', '-submitted_at', '-id'], name='quiz_result_user_submitted_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0018_quiz_difficulty_quizresult_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'id'], name='chat_message_conversation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'timestamp'], name='chat_message_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0019_chatmessage_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='summarized_until_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
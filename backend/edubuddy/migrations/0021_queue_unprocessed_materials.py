@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:40
+
+from django.db import migrations
+
+
+def create_jobs_for_queued_materials(apps, schema_editor):
+    # 0014 marked materials that were never processed as queued without giving them a job
+    Material = apps.get_model('edubuddy', 'Material')
+    IngestionJob = apps.get_model('edubuddy', 'IngestionJob')
+    materials = Material.objects.filter(processing_status='queued', ingestion_jobs__isnull=True)
+    IngestionJob.objects.bulk_create([IngestionJob(material=material) for material in materials])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edubuddy', '0020_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_jobs_for_queued_materials, migrations.RunPython.noop),
+    ]
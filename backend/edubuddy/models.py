@@ -1,5 +1,8 @@
 # edubuddy/models.py
 
+import json
+import zlib
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -25,6 +28,9 @@ class Conversation(models.Model):
     user = models.ForeignKey(EduBuddyUser, on_delete=models.CASCADE, related_name='conversations')
     title = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Rolling summary of every message up to and including summarized_until_id
+    summary = models.TextField(blank=True, default="")
+    summarized_until_id = models.BigIntegerField(null=True, blank=True)
 
     def __str__(self):
         return f"Conversation {self.id} - {self.user.email}"
@@ -36,6 +42,12 @@ class ChatMessage(models.Model):
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='chat_message_conversation_idx'),
+            models.Index(fields=['conversation', 'timestamp'], name='chat_message_timestamp_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sender}: {self.message[:30]}"
 
@@ -48,10 +60,22 @@ class Category(models.Model):
 
 
 class Material(models.Model):
+    PROCESSING_STATUSES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
     subject = models.CharField(max_length=255)
     description = models.TextField()
     file = models.FileField(upload_to='data/')
     is_processed = models.BooleanField(default=False)
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    processing_status = models.CharField(max_length=15, choices=PROCESSING_STATUSES, default="queued")
+    processing_error = models.TextField(blank=True, default="")
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    processing_finished_at = models.DateTimeField(null=True, blank=True)
 
     uploaded_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -63,16 +87,82 @@ class Material(models.Model):
         return self.subject
 
 
+class MaterialText(models.Model):
+    material = models.OneToOneField(Material, on_delete=models.CASCADE, related_name='extracted_text')
+    content_hash = models.CharField(max_length=64)
+    page_count = models.IntegerField()
+    # zlib-compressed JSON list with the text of every page, "" for blank pages
+    pages = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def get_pages(self):
+        return json.loads(zlib.decompress(bytes(self.pages)).decode("utf-8"))
+
+    def set_pages(self, pages):
+        self.pages = zlib.compress(json.dumps(pages).encode("utf-8"))
+        self.page_count = len(pages)
+
+    def __str__(self):
+        return f"Text of {self.material_id} ({self.page_count} pages)"
+
+
+class IngestionJob(models.Model):
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='ingestion_jobs')
+    status = models.CharField(max_length=15, choices=Material.PROCESSING_STATUSES, default="queued")
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='ingestion_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ingestion of {self.material_id} - {self.status}"
+
+
 class Quiz(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # {"<question id>": {"answer_id": <correct answer id>, "text": <correct answer text>, "option_ids": [...]}}
+    answer_key = models.JSONField(default=dict, blank=True)
+    # Same as the difficulty of every question, kept here so listings do not need the questions
+    difficulty = models.CharField(max_length=15, blank=True, default="")
 
     user = models.ForeignKey(EduBuddyUser, on_delete=models.CASCADE)
 
     def __str__(self):
         return self.title
 
+    def get_answer_key(self):
+        """Return the answer key with integer question ids, building and storing it if it is missing."""
+        if not self.answer_key or any("option_ids" not in entry for entry in self.answer_key.values()):
+            self.answer_key = self.build_answer_key()
+            Quiz.objects.filter(pk=self.pk).update(answer_key=self.answer_key)
+        return {int(question_id): entry for question_id, entry in self.answer_key.items()}
+
+    def build_answer_key(self):
+        return self.answer_key_from(
+            Answer.objects.filter(question__quiz=self).values_list('id', 'question_id', 'text', 'is_correct')
+        )
+
+    @staticmethod
+    def answer_key_from(answers):
+        """Build an answer key from (answer id, question id, text, is_correct) tuples."""
+        answer_key = {}
+        for answer_id, question_id, text, is_correct in answers:
+            entry = answer_key.setdefault(str(question_id), {"answer_id": None, "text": "", "option_ids": []})
+            entry["option_ids"].append(answer_id)
+            if is_correct:
+                entry["answer_id"] = answer_id
+                entry["text"] = text
+
+        return {question_id: entry for question_id, entry in answer_key.items() if entry["answer_id"] is not None}
+
 
 class Question(models.Model):
     DIFFICULTY_LEVELS = [
@@ -112,6 +202,11 @@ class QuizResult(models.Model):
     total_questions = models.IntegerField()
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-submitted_at', '-id'], name='quiz_result_user_submitted_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - {self.score}/{self.total_questions}"
 
@@ -119,8 +214,16 @@ class QuizResult(models.Model):
 class QuestionResult(models.Model):
     quiz_result = models.ForeignKey(QuizResult, related_name="question_results", on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
-    selected_answer = models.CharField(max_length=255)
+    selected_option = models.ForeignKey(Answer, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Text of the selected answer, only filled for results saved before selected_option existed
+    selected_answer = models.CharField(max_length=255, blank=True, default="")
     is_correct = models.BooleanField()
 
+    @property
+    def selected_answer_text(self):
+        if self.selected_option_id is not None:
+            return self.selected_option.text
+        return self.selected_answer
+
     def __str__(self):
         return f"{self.question.text[:30]}... - {'True' if self.is_correct else 'False'}"
@@ -0,0 +1,278 @@
+import asyncio
+import threading
+
+import httpx
+from django.conf import settings
+from openai import OpenAI, AsyncOpenAI
+
+
+class PoolMetrics:
+    """
+    Counters for one HTTP connection pool.
+
+    A request counts as in flight from the moment it is sent until its response body is
+    closed, whether it holds a connection or is still waiting for one. `saturated` counts
+    requests that arrived while every connection was busy and so queued on the pool.
+    """
+
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated = 0
+        self.pool_timeouts = 0
+        self.errors = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_connections:
+                self.saturated += 1
+            self.in_flight += 1
+            self.requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, error=None):
+        with self._lock:
+            self.in_flight -= 1
+            if isinstance(error, httpx.PoolTimeout):
+                self.pool_timeouts += 1
+            elif error is not None:
+                self.errors += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_connections": self.max_connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "utilization": round(self.in_flight / self.max_connections, 3),
+                "requests": self.requests,
+                "saturated": self.saturated,
+                "pool_timeouts": self.pool_timeouts,
+                "errors": self.errors,
+            }
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request):
+        self.metrics.acquire()
+        try:
+            response = super().handle_request(request)
+        except Exception as e:
+            self.metrics.release(e)
+            raise
+        response.stream = _ReleasingStream(response.stream, self.metrics.release)
+        return response
+
+
+class AsyncInstrumentedTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request):
+        self.metrics.acquire()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception as e:
+            self.metrics.release(e)
+            raise
+        response.stream = _AsyncReleasingStream(response.stream, self.metrics.release)
+        return response
+
+
+class OpenAIClientPool:
+    """
+    Process-wide OpenAI clients shared by the chatbot, quiz generation and TTS.
+
+    Every client sends through one pooled httpx client with explicit limits, keep-alive
+    and timeouts, so connections to the API are reused instead of being opened per
+    request. Failed requests are retried by the OpenAI SDK (OPENAI_MAX_RETRIES times,
+    exponential backoff with jitter, honouring Retry-After).
+
+    httpx async connections belong to the event loop that opened them, so async
+    clients are kept per loop and closed when that loop shuts down. Under WSGI every
+    async_to_sync call runs on a new loop, so this keeps their connections from piling up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._openai_client = None
+        self._chat_models = {}
+        self._loop_clients = {}
+        self.sync_metrics = PoolMetrics(settings.OPENAI_MAX_CONNECTIONS)
+        self.async_metrics = PoolMetrics(settings.OPENAI_MAX_CONNECTIONS)
+
+    def get_client(self):
+        with self._lock:
+            if self._openai_client is None:
+                self._http_client = httpx.Client(
+                    transport=InstrumentedTransport(self.sync_metrics, limits=self._limits(), retries=0),
+                    timeout=self._timeout(),
+                )
+                self._openai_client = OpenAI(http_client=self._http_client, **self._client_params())
+            return self._openai_client
+
+    def get_async_client(self):
+        return self._get_loop_clients()["openai"]
+
+    def get_chat_model(self, model, temperature):
+        """Return a shared ChatOpenAI bound to the pooled clients (per event loop when called from one)."""
+        try:
+            loop_clients = self._get_loop_clients()
+        except RuntimeError:
+            loop_clients = None
+
+        chat_models = loop_clients["chat_models"] if loop_clients is not None else self._chat_models
+        key = (model, temperature)
+        with self._lock:
+            chat_model = chat_models.get(key)
+        if chat_model is not None:
+            return chat_model
+
+        from langchain_openai import ChatOpenAI
+
+        client = self.get_client()
+        clients = {"root_client": client, "client": client.chat.completions}
+        if loop_clients is not None:
+            async_client = loop_clients["openai"]
+            clients.update(root_async_client=async_client, async_client=async_client.chat.completions)
+
+        chat_model = ChatOpenAI(model=model, temperature=temperature, **clients)
+        with self._lock:
+            return chat_models.setdefault(key, chat_model)
+
+    def stats(self):
+        with self._lock:
+            event_loops = len(self._loop_clients)
+        return {
+            "base_url": settings.OPENAI_BASE_URL or "default",
+            "sync": self.sync_metrics.stats(),
+            "async": self.async_metrics.stats(),
+            "event_loops": event_loops,
+        }
+
+    def _get_loop_clients(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_clients = self._loop_clients.get(loop)
+            if loop_clients is None:
+                # Loops closed without cancelling their tasks never ran _close_with_loop
+                for closed_loop in [other for other in self._loop_clients if other.is_closed()]:
+                    del self._loop_clients[closed_loop]
+
+                http_client = httpx.AsyncClient(
+                    transport=AsyncInstrumentedTransport(self.async_metrics, limits=self._limits(), retries=0),
+                    timeout=self._timeout(),
+                )
+                loop_clients = {
+                    "openai": AsyncOpenAI(http_client=http_client, **self._client_params()),
+                    "chat_models": {},
+                }
+                self._loop_clients[loop] = loop_clients
+                loop_clients["closer"] = loop.create_task(self._close_with_loop(loop, http_client))
+            return loop_clients
+
+    async def _close_with_loop(self, loop, http_client):
+        """Wait until the loop cancels its remaining tasks on shutdown, then close its client."""
+        try:
+            await loop.create_future()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._loop_clients.pop(loop, None)
+            await http_client.aclose()
+            raise
+
+    @staticmethod
+    def _client_params():
+        return {
+            "api_key": settings.OPENAI_API_KEY or None,
+            "base_url": settings.OPENAI_BASE_URL or None,
+            "max_retries": settings.OPENAI_MAX_RETRIES,
+            "timeout": OpenAIClientPool._timeout(),
+        }
+
+    @staticmethod
+    def _limits():
+        return httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        )
+
+    @staticmethod
+    def _timeout():
+        return httpx.Timeout(
+            connect=settings.OPENAI_CONNECT_TIMEOUT,
+            read=settings.OPENAI_READ_TIMEOUT,
+            write=settings.OPENAI_WRITE_TIMEOUT,
+            pool=settings.OPENAI_POOL_TIMEOUT,
+        )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OpenAIClientPool()
+        return _pool
+
+
+def get_openai_client():
+    return get_client_pool().get_client()
+
+
+def get_async_openai_client():
+    return get_client_pool().get_async_client()
+
+
+def get_chat_openai(model, temperature):
+    return get_client_pool().get_chat_model(model, temperature)
@@ -0,0 +1,67 @@
+import logging
+
+import pdfplumber
+from django.conf import settings
+from pdf2image import convert_from_path
+from pytesseract import pytesseract
+
+from .utils import get_shared_pool, ordered_results
+
+logger = logging.getLogger(__name__)
+
+
+def ocr_page(pdf_path, page_number):
+    """OCR one page; a page that cannot be OCRed counts as blank instead of failing the document."""
+    text = ""
+    try:
+        for image in convert_from_path(pdf_path, first_page=page_number, last_page=page_number):
+            text += pytesseract.image_to_string(image)
+            image.close()
+    except Exception:
+        logger.exception("OCR failed for page %s of %s", page_number, pdf_path)
+        return ""
+    return text.strip()
+
+
+def iter_pdf_page_texts(pdf_path, ocr_workers=None):
+    """
+    Yield the text of every page of the PDF (empty string for blank pages), in page order.
+
+    Pages where pdfplumber finds no text are rasterized and OCRed one page at a time,
+    fanned out over this process's shared pool of `ocr_workers` processes (OCR_WORKERS by
+    default). Pages are read lazily, so a caller that stops early stops the OCR too.
+    """
+    if ocr_workers is None:
+        ocr_workers = settings.OCR_WORKERS
+    executor = get_shared_pool("ocr", ocr_workers) if ocr_workers > 1 else None
+
+    def extract(page_number):
+        page = pdf.pages[page_number - 1]
+        page_text = page.extract_text()
+        page.close()
+
+        if page_text:
+            return page_text
+        if executor is not None:
+            return executor.submit(ocr_page, pdf_path, page_number)
+        return ocr_page(pdf_path, page_number)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_numbers = range(1, len(pdf.pages) + 1)
+        for _, page_text in ordered_results(page_numbers, extract, ocr_workers):
+            yield page_text
+
+
+def join_pages(pages, max_chars=None):
+    """Join page texts, stopping as soon as max_chars characters have been collected."""
+    collected = []
+    length = 0
+    for page_text in pages:
+        if not page_text:
+            continue
+        collected.append(page_text)
+        length += len(page_text) + 1
+        if max_chars is not None and length >= max_chars:
+            break
+
+    return "\n".join(collected).strip()
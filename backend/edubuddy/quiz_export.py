@@ -0,0 +1,133 @@
+import csv
+import zipfile
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import QuizResult, QuestionResult
+from .quiz_report import build_report_data, render_report_bytes, report_cache_path
+from .utils import get_shared_pool, ordered_results
+
+EXPORT_FORMATS = ("zip", "csv")
+
+CSV_HEADER = [
+    "quiz_result_id", "submitted_at", "user_id", "username", "quiz_id", "quiz_title", "score", "total_questions",
+    "question_id", "question", "selected_answer", "correct_answer", "is_correct",
+]
+
+def get_render_executor():
+    """Process pool shared by exports in this process, or None to render in the caller."""
+    if settings.QUIZ_EXPORT_WORKERS <= 1:
+        return None
+    return get_shared_pool("quiz_export", settings.QUIZ_EXPORT_WORKERS)
+
+
+def export_queryset(user_ids=None, quiz_ids=None, submitted_from=None, submitted_to=None):
+    """
+    QuizResults to export, with everything the reports read.
+
+    Iterated with `.iterator(chunk_size=...)`, this is one query for a chunk of results
+    and one for their question results, however many students and quizzes are exported.
+    """
+    results = QuizResult.objects.select_related('quiz', 'user').prefetch_related(
+        Prefetch(
+            'question_results',
+            queryset=QuestionResult.objects.select_related('question', 'selected_option').order_by('id')
+        )
+    ).order_by('submitted_at', 'id')
+
+    if user_ids:
+        results = results.filter(user_id__in=user_ids)
+    if quiz_ids:
+        results = results.filter(quiz_id__in=quiz_ids)
+    if submitted_from:
+        results = results.filter(submitted_at__date__gte=submitted_from)
+    if submitted_to:
+        results = results.filter(submitted_at__date__lte=submitted_to)
+    return results
+
+
+def iter_results(results):
+    """Yield (quiz_result, report data) pairs, building each quiz's answer key once."""
+    answer_keys = {}
+    for quiz_result in results.iterator(chunk_size=settings.QUIZ_EXPORT_CHUNK_SIZE):
+        if quiz_result.quiz_id not in answer_keys:
+            answer_keys[quiz_result.quiz_id] = quiz_result.quiz.get_answer_key()
+        yield quiz_result, build_report_data(quiz_result, answer_keys[quiz_result.quiz_id])
+
+
+class _StreamBuffer:
+    """File-like object that collects written bytes until the generator hands them out."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _TextWriter:
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def write(self, text):
+        return self.buffer.write(text.encode("utf-8"))
+
+
+def iter_csv(results):
+    """Stream one CSV row per answered question."""
+    buffer = _StreamBuffer()
+    writer = csv.writer(_TextWriter(buffer))
+    writer.writerow(CSV_HEADER)
+
+    for quiz_result, data in iter_results(results):
+        for question_result, row in zip(quiz_result.question_results.all(), data["rows"]):
+            writer.writerow([
+                quiz_result.id, quiz_result.submitted_at.isoformat(), quiz_result.user_id, data["username"],
+                quiz_result.quiz_id, data["quiz_title"], data["score"], data["total"],
+                question_result.question_id, *row,
+            ])
+        yield buffer.pop()
+
+
+def iter_zip(results, executor=None, workers=1):
+    """
+    Stream a ZIP with one PDF report per result.
+
+    Reports are rendered by `executor` with at most two per worker in flight, so memory
+    stays bounded by the window, not by the size of the export. Reports already in the
+    report cache are read from disk instead.
+    """
+    buffer = _StreamBuffer()
+
+    # PDFs are already compressed, deflating them again costs CPU for little gain
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        reports = ordered_results(iter_results(results), lambda item: _render(*item, executor), workers)
+        for (quiz_result, _), report in reports:
+            name = f"{quiz_result.user.username}/quiz_{quiz_result.quiz_id}_result_{quiz_result.id}.pdf"
+            archive.writestr(name, report)
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def _render(quiz_result, data, executor):
+    if settings.QUIZ_REPORT_CACHE_DIR:
+        try:
+            with open(report_cache_path(quiz_result), "rb") as report:
+                return report.read()
+        except FileNotFoundError:
+            pass
+
+    if executor is None:
+        return render_report_bytes(data)
+    return executor.submit(render_report_bytes, data)
+
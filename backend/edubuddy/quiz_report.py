@@ -0,0 +1,182 @@
+# render_report_bytes runs inside ProcessPoolExecutor workers, so this module must stay
+# importable without Django being set up (settings are only read by the cache helpers)
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
+# Bump when the layout changes, so cached reports are rendered again
+REPORT_VERSION = 1
+
+_fonts_registered = False
+_fonts_lock = threading.Lock()
+
+
+def register_fonts():
+    """Parse the DejaVu TTFs once per process instead of on every report."""
+    global _fonts_registered
+    if _fonts_registered:
+        return
+
+    with _fonts_lock:
+        if not _fonts_registered:
+            pdfmetrics.registerFont(TTFont('DejaVu', os.path.join(FONT_DIR, 'DejaVuSans.ttf')))
+            pdfmetrics.registerFont(TTFont('DejaVu-Bold', os.path.join(FONT_DIR, 'DejaVuSans-Bold.ttf')))
+            _fonts_registered = True
+
+
+def build_report_data(quiz_result, answer_key):
+    """
+    Everything the report shows, as plain data.
+
+    Expects `quiz_result` with its quiz and user selected and its question results
+    (with question and selected option) prefetched.
+    """
+    rows = []
+    for question_result in quiz_result.question_results.all():
+        rows.append([
+            question_result.question.text,
+            question_result.selected_answer_text,
+            answer_key.get(question_result.question_id, {}).get("text", ""),
+            "True" if question_result.is_correct else "False",
+        ])
+
+    return {
+        "quiz_id": quiz_result.quiz_id,
+        "quiz_title": quiz_result.quiz.title,
+        "username": quiz_result.user.username,
+        "score": quiz_result.score,
+        "total": quiz_result.total_questions,
+        "rows": rows,
+    }
+
+
+def draw_wrapped_text(p, text, x, y, font_name, font_size, max_width):
+    lines = simpleSplit(text, font_name, font_size, max_width)
+    for line in lines:
+        p.drawString(x, y, line)
+        y -= font_size + 2
+    return y
+
+
+def render_report(data, output):
+    """Write the PDF report for `build_report_data` output to a binary file object."""
+    register_fonts()
+
+    p = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+
+    p.setFont("DejaVu-Bold", 11)
+    p.drawString(100, height - 50, f"Quiz Title: {data['quiz_title']} {data['quiz_id']}")
+    p.drawString(100, height - 70, f"User: {data['username']}")
+    p.drawString(100, height - 90, f"Score: {data['score']} / {data['total']}")
+    p.drawString(100, height - 120, "Results:")
+
+    p.setFont("DejaVu", 10)
+    y_position = height - 140
+
+    max_width = 400
+
+    for row in data["rows"]:
+        question_text = f"Question: {row[0]}"
+        selected_answer = f"Your Answer: {row[1]}"
+        correct_answer = f"Correct Answer: {row[2]}"
+        result = f"Result: {row[3]}"
+
+        for content in [question_text, selected_answer, correct_answer, result]:
+            y_position = draw_wrapped_text(p, content, 100, y_position, "DejaVu", 10, max_width)
+
+        y_position -= 20
+
+        if y_position < 50:
+            p.showPage()
+            p.setFont("DejaVu", 10)
+            y_position = height - 50
+
+    p.showPage()
+    p.save()
+
+
+def render_report_bytes(data):
+    output = io.BytesIO()
+    render_report(data, output)
+    return output.getvalue()
+
+
+def report_filename(quiz_result):
+    return f"quiz_result_{quiz_result.quiz.title}.pdf"
+
+
+def report_cache_path(quiz_result):
+    """
+    Cache file of a QuizResult's report.
+
+    Answers never change after a result is saved, but the quiz title and username on the
+    report can, so they are part of the file name together with the layout version.
+    """
+    fingerprint = json.dumps([REPORT_VERSION, quiz_result.quiz.title, quiz_result.user.username])
+    digest = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(settings.QUIZ_REPORT_CACHE_DIR, f"{quiz_result.id}-{digest}.pdf")
+
+
+def open_quiz_report(quiz_result, load_data):
+    """
+    Return an open binary file with the report of `quiz_result`.
+
+    Served from the report cache when possible; otherwise `load_data()` supplies the
+    `build_report_data` output, the PDF is rendered into a spooled temporary file and
+    a copy is kept in the cache.
+    """
+    cache_path = report_cache_path(quiz_result) if settings.QUIZ_REPORT_CACHE_DIR else None
+    if cache_path is not None:
+        try:
+            return open(cache_path, "rb")
+        except FileNotFoundError:
+            pass
+
+    report = tempfile.SpooledTemporaryFile(max_size=settings.QUIZ_REPORT_SPOOL_BYTES)
+    render_report(load_data(), report)
+
+    if cache_path is not None:
+        store_report(quiz_result.id, cache_path, report)
+    report.seek(0)
+    return report
+
+
+def store_report(quiz_result_id, cache_path, report):
+    directory = os.path.dirname(cache_path)
+    os.makedirs(directory, exist_ok=True)
+
+    report.seek(0)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".part")
+    with os.fdopen(fd, "wb") as cache_file:
+        shutil.copyfileobj(report, cache_file)
+    os.replace(temp_path, cache_path)
+
+    # Drop reports rendered before a rename or a layout change
+    delete_cached_reports(quiz_result_id, keep=cache_path)
+
+
+def delete_cached_reports(quiz_result_id, keep=None):
+    if not settings.QUIZ_REPORT_CACHE_DIR:
+        return
+
+    for path in glob.glob(os.path.join(settings.QUIZ_REPORT_CACHE_DIR, f"{quiz_result_id}-*.pdf")):
+        if path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+
+class SemanticCache:
+    """
+    In-process LRU/TTL cache of chatbot answers keyed by the query embedding.
+
+    A lookup hits when a cached query is at least `threshold` cosine-similar to the
+    new one. Entries belong to one index version and are all dropped when it changes.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=1000, ttl_seconds=86400):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._next_key = 0
+        self._index_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, embedding, index_version):
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            self._switch_index_version(index_version)
+
+            best_key, best_similarity = None, -1.0
+            for key, (cached_vector, response, created_at) in list(self._entries.items()):
+                if now - created_at > self.ttl_seconds:
+                    del self._entries[key]
+                    continue
+
+                similarity = float(np.dot(vector, cached_vector))
+                if similarity > best_similarity:
+                    best_key, best_similarity = key, similarity
+
+            if best_key is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][1]
+
+    def store(self, embedding, index_version, response):
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            self._switch_index_version(index_version)
+
+            self._entries[self._next_key] = (vector, response, time.monotonic())
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "index_version": self._index_version,
+            }
+
+    def _switch_index_version(self, index_version):
+        if index_version != self._index_version:
+            self._entries.clear()
+            self._index_version = index_version
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Return the process-wide cache, or None when SEMANTIC_CACHE_ENABLED is off."""
+    global _semantic_cache
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.SEMANTIC_CACHE_TTL,
+            )
+        return _semantic_cache
@@ -45,14 +45,19 @@ class ConversationSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'created_at', 'title']
 
 
+class ConversationSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Conversation
+        fields = ['id', 'title', 'created_at']
+
+
 class ChatMessageSerializer(serializers.ModelSerializer):
-    conversation = ConversationSerializer()
     sender = serializers.CharField(max_length=10)
     message = serializers.CharField()
 
     class Meta:
         model = ChatMessage
-        fields = ['id', 'conversation', 'sender', 'message', 'timestamp']
+        fields = ['id', 'sender', 'message', 'timestamp']
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -72,8 +77,11 @@ class MaterialSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Material
-        fields = ['id', 'subject', 'description', 'file', 'is_processed', 'category', 'category_id', 'uploaded_at',
+        fields = ['id', 'subject', 'description', 'file', 'is_processed', 'processing_status', 'processing_error',
+                  'processing_started_at', 'processing_finished_at', 'category', 'category_id', 'uploaded_at',
                   'user']
+        read_only_fields = ['is_processed', 'processing_status', 'processing_error', 'processing_started_at',
+                            'processing_finished_at']
         extra_kwargs = {
             'file': {'required': True},
             'user': {'read_only': True},
@@ -108,27 +116,22 @@ class QuizSerializer(serializers.ModelSerializer):
 
 
 class QuestionResultSerializer(serializers.ModelSerializer):
-    question_id = serializers.IntegerField(source='question.id')
-    selected_answer = serializers.CharField()
+    question_id = serializers.IntegerField()
+    selected_answer_id = serializers.IntegerField(source='selected_option_id', allow_null=True)
+    selected_answer = serializers.CharField(source='selected_answer_text')
     difficulty = serializers.CharField(source='question.difficulty')
 
     class Meta:
         model = QuestionResult
-        fields = ['question_id', 'selected_answer', 'difficulty']
+        fields = ['question_id', 'selected_answer_id', 'selected_answer', 'is_correct', 'difficulty']
 
 
 class QuizResultSummarySerializer(serializers.ModelSerializer):
     title = serializers.CharField(source='quiz.title')
     question_results = QuestionResultSerializer(many=True)
-    difficulty = serializers.SerializerMethodField()
+    difficulty = serializers.CharField(source='quiz.difficulty')
 
     class Meta:
         model = QuizResult
         fields = ['id', 'quiz_id', 'title', 'difficulty', 'score', 'total_questions', 'submitted_at',
                   'question_results']
-
-    def get_difficulty(self, obj):
-        first_question_result = obj.question_results.first()
-        if first_question_result:
-            return first_question_result.question.difficulty
-        return ""
@@ -0,0 +1,45 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Answer, Question, Quiz, QuizResult
+from .quiz_report import delete_cached_reports
+
+
+def _deleted_directly(origin, model):
+    """
+    Whether a delete started at `model` itself rather than cascading from a parent.
+
+    Cascades from a question, quiz or user skip invalidation: the question's own receiver
+    or the quiz's deletion already takes care of the answer key.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver(post_save, sender=Answer)
+def invalidate_answer_key_on_answer_save(sender, instance, **kwargs):
+    Quiz.objects.filter(questions__id=instance.question_id).update(answer_key={})
+
+
+@receiver(post_delete, sender=Answer)
+def invalidate_answer_key_on_answer_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, Answer):
+        Quiz.objects.filter(questions__id=instance.question_id).update(answer_key={})
+
+
+@receiver(post_save, sender=Question)
+def invalidate_answer_key_on_question_save(sender, instance, **kwargs):
+    Quiz.objects.filter(pk=instance.quiz_id).update(answer_key={})
+
+
+@receiver(post_delete, sender=Question)
+def invalidate_answer_key_on_question_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, Question):
+        Quiz.objects.filter(pk=instance.quiz_id).update(answer_key={})
+
+
+@receiver(post_delete, sender=QuizResult)
+def delete_quiz_report_on_result_delete(sender, instance, **kwargs):
+    delete_cached_reports(instance.id)
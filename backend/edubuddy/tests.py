@@ -0,0 +1,358 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.db import connection
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .ingestion import _drain_queue_in_thread, enqueue_material
+from .openai_clients import get_chat_openai, get_client_pool, get_openai_client
+from .semantic_cache import get_semantic_cache
+from .models import EduBuddyUser, Role, Quiz, Question, Answer, QuizResult, ChatMessage, Conversation, IngestionJob, \
+    Material
+
+
+def create_user(username="student", role_name="USER"):
+    role, _ = Role.objects.get_or_create(name=role_name)
+    return EduBuddyUser.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        first_name="Test",
+        last_name="User",
+        role=role,
+    )
+
+
+def create_quiz(user, question_count):
+    quiz = Quiz.objects.create(title="Quiz", user=user, difficulty="easy")
+    for number in range(question_count):
+        question = Question.objects.create(quiz=quiz, text=f"Question {number}")
+        Answer.objects.create(question=question, text="Right", is_correct=True)
+        Answer.objects.create(question=question, text="Wrong", is_correct=False)
+
+    # Build the stored answer key up front, like GenerateQuestionsView.save_quiz does
+    quiz.get_answer_key()
+    return quiz
+
+
+class SaveQuizResultViewTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def submit(self, quiz):
+        question_results = []
+        for question in quiz.questions.prefetch_related("answers"):
+            answer = next(answer for answer in question.answers.all() if answer.is_correct)
+            question_results.append({"question_id": question.id, "answer_id": answer.id})
+
+        return self.client.post("/api/edu-buddy/quiz-result/create", {
+            "quiz_id": quiz.id,
+            "question_results": question_results,
+        }, format="json")
+
+    def test_grades_submission(self):
+        quiz = create_quiz(self.user, question_count=3)
+
+        response = self.submit(quiz)
+
+        self.assertEqual(response.status_code, 201)
+        quiz_result = QuizResult.objects.get(quiz=quiz)
+        self.assertEqual((quiz_result.score, quiz_result.total_questions), (3, 3))
+
+    def test_query_count_does_not_grow_with_questions(self):
+        small_quiz = create_quiz(self.user, question_count=2)
+        large_quiz = create_quiz(self.user, question_count=20)
+
+        with CaptureQueriesContext(connection) as small_quiz_queries:
+            self.assertEqual(self.submit(small_quiz).status_code, 201)
+
+        with self.assertNumQueries(len(small_quiz_queries)):
+            self.assertEqual(self.submit(large_quiz).status_code, 201)
+
+
+class AnswerKeyInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+
+    def test_deleting_question_clears_answer_key(self):
+        quiz = create_quiz(self.user, question_count=2)
+
+        quiz.questions.first().delete()
+
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.answer_key, {})
+
+    def test_deleting_quiz_does_not_invalidate_per_row(self):
+        small_quiz = create_quiz(self.user, question_count=2)
+        large_quiz = create_quiz(self.user, question_count=20)
+
+        with CaptureQueriesContext(connection) as small_quiz_queries:
+            small_quiz.delete()
+
+        with self.assertNumQueries(len(small_quiz_queries)):
+            large_quiz.delete()
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion with the same message and records the paths it was sent to."""
+
+    completion = {
+        "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "Stub answer"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.paths.append(self.path)
+
+        body = json.dumps(self.completion).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OpenAIClientPoolTests(SimpleTestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAIHandler)
+        server.paths = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+
+        settings_override = override_settings(
+            OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1", OPENAI_API_KEY="test", OPENAI_MAX_RETRIES=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # A fresh pool, so the clients pick up the stub base URL
+        patch = mock.patch("edubuddy.openai_clients._pool", None)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_requests_go_through_the_pooled_clients(self):
+        messages = [{"role": "user", "content": "Hello"}]
+        completion = get_openai_client().chat.completions.create(model="gpt-4o", messages=messages)
+        self.assertEqual(completion.choices[0].message.content, "Stub answer")
+
+        self.assertEqual(get_chat_openai(model="gpt-4o", temperature=0.2).invoke(messages).content, "Stub answer")
+
+        async def ainvoke():
+            return (await get_chat_openai(model="gpt-4o", temperature=0.2).ainvoke(messages)).content
+
+        self.assertEqual(async_to_sync(ainvoke)(), "Stub answer")
+
+        self.assertEqual(self.server.paths, ["/v1/chat/completions"] * 3)
+        stats = get_client_pool().stats()
+        self.assertEqual((stats["sync"]["requests"], stats["sync"]["in_flight"]), (2, 0))
+        self.assertEqual((stats["async"]["requests"], stats["async"]["in_flight"]), (1, 0))
+        self.assertEqual(stats["event_loops"], 0)
+
+
+class OpenAIStatsViewTests(TestCase):
+    def test_requires_admin_role(self):
+        client = APIClient()
+        user = create_user()
+        client.force_authenticate(user=user)
+        self.assertEqual(client.get("/api/edu-buddy/openai/stats").status_code, 403)
+
+        user.role, _ = Role.objects.get_or_create(name="ADMIN")
+        user.save()
+        response = client.get("/api/edu-buddy/openai/stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("event_loops", response.data)
+
+
+@override_settings(SEMANTIC_CACHE_ENABLED=True)
+class ChatbotStatsViewTests(TestCase):
+    def test_reports_semantic_cache_hits_and_misses(self):
+        patch = mock.patch("edubuddy.semantic_cache._semantic_cache", None)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        semantic_cache = get_semantic_cache()
+        semantic_cache.lookup([1.0, 0.0], index_version=1)
+        semantic_cache.store([1.0, 0.0], index_version=1, response="Answer")
+        semantic_cache.lookup([1.0, 0.0], index_version=1)
+
+        client = APIClient()
+        client.force_authenticate(user=create_user(role_name="ADMIN"))
+        response = client.get("/api/edu-buddy/chatbot/stats")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("embedding_load_seconds", response.data["vector_store"])
+        stats = response.data["semantic_cache"]
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (1, 1, 1))
+
+
+class ConversationHistoryTests(TestCase):
+    def setUp(self):
+        self.conversation = Conversation.objects.create(user=create_user(), title="Conversation")
+        patch = mock.patch("edubuddy.management.commands.query_data.invoke_model", return_value="Summary")
+        self.invoke_model = patch.start()
+        self.addCleanup(patch.stop)
+
+    def add_message(self, sender="user"):
+        # About ten tokens each
+        return ChatMessage.objects.create(conversation=self.conversation, sender=sender, message="x" * 36)
+
+    @override_settings(CHATBOT_HISTORY_TOKEN_BUDGET=60)
+    def test_summarizes_every_few_turns(self):
+        from .management.commands.query_data import build_history
+
+        for _ in range(12):
+            user_message = self.add_message()
+            build_history(self.conversation, before_message_id=user_message.id)
+            self.add_message(sender="bot")
+
+        # Every turn adds two messages; cutting back to half the budget leaves room for two turns
+        self.assertLessEqual(self.invoke_model.call_count, 5)
+        self.assertEqual(self.conversation.summary, "Summary")
+
+    @override_settings(CHATBOT_HISTORY_TOKEN_BUDGET=1000, CHATBOT_HISTORY_MAX_MESSAGES=5)
+    def test_pages_through_long_backlog(self):
+        from .management.commands.query_data import build_history
+
+        messages = [self.add_message() for _ in range(12)]
+
+        build_history(self.conversation)
+        self.assertEqual(self.conversation.summarized_until_id, messages[4].id)
+
+        build_history(self.conversation)
+        self.assertEqual(self.conversation.summarized_until_id, messages[6].id)
+
+
+@override_settings(INGESTION_INLINE_WORKERS=0)
+class InlineIngestionTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+
+        # The index itself needs the embedding model; these tests only follow the queue
+        patches = [
+            mock.patch("edubuddy.ingestion.call_command"),
+            mock.patch("edubuddy.ingestion.connection"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def create_material(self):
+        return Material.objects.create(subject="Biology", description="", file="data/biology.pdf", user=self.user)
+
+    def test_drains_every_queued_job(self):
+        first = self.create_material()
+        second = self.create_material()
+        enqueue_material(first)
+        enqueue_material(second)
+
+        _drain_queue_in_thread()
+
+        self.assertEqual(
+            set(Material.objects.values_list("processing_status", flat=True)), {"done"}
+        )
+
+    def test_requeues_stale_running_jobs(self):
+        material = self.create_material()
+        job = enqueue_material(material)
+        IngestionJob.objects.filter(pk=job.pk).update(
+            status="running", started_at=timezone.now() - timedelta(days=1)
+        )
+
+        _drain_queue_in_thread()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("done", 1))
+
+
+def parse_sse(body):
+    events = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        event = {"event": "message"}
+        for line in block.split("\n"):
+            field, _, value = line.partition(": ")
+            event[field] = value
+        event["data"] = json.loads(event["data"])
+        events.append(event)
+    return events
+
+
+@override_settings(CHATBOT_MODEL_BACKEND="fake", CHATBOT_FAKE_RESPONSE="Photosynthesis makes sugar.",
+                   SEMANTIC_CACHE_ENABLED=False)
+class ChatbotMessageStreamViewTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+
+        # Retrieval needs the embedding model and a Chroma index, which tests do not have
+        embedding_function = mock.Mock()
+        embedding_function.embed_query.return_value = [0.0]
+        patches = [
+            mock.patch("edubuddy.management.commands.query_data.get_embedding_function",
+                       return_value=embedding_function),
+            mock.patch("edubuddy.management.commands.query_data.build_prompt", return_value="prompt"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def stream(self, message="What is photosynthesis?"):
+        response = self.client.post("/api/edu-buddy/chatbot/message/stream", {"message": message}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return parse_sse(b"".join(response.streaming_content))
+
+    def test_streams_fake_model_answer(self):
+        self.client.force_authenticate(user=self.user)
+
+        events = self.stream()
+
+        self.assertEqual(events[0]["event"], "start")
+        self.assertEqual(events[-1]["event"], "done")
+        tokens = "".join(event["data"]["token"] for event in events if event["event"] == "message")
+        self.assertEqual(tokens, "Photosynthesis makes sugar.")
+
+        conversation = Conversation.objects.get(user=self.user)
+        self.assertEqual(events[0]["data"]["conversation_id"], conversation.id)
+        self.assertEqual(events[-1]["data"]["conversation"]["id"], conversation.id)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(conversation=conversation).order_by("id").values_list("sender", "message")),
+            [("user", "What is photosynthesis?"), ("bot", "Photosynthesis makes sugar.")],
+        )
+
+    def test_anonymous_answer_is_not_stored(self):
+        events = self.stream()
+
+        self.assertEqual(events[0]["data"], {"conversation_id": None})
+        self.assertEqual(events[-1]["data"], {"message": {"sender": "bot", "message": "Photosynthesis makes sugar."}})
+        self.assertFalse(ChatMessage.objects.exists())
+
+    def test_model_error_ends_stream_with_error_event(self):
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch("edubuddy.management.commands.query_data.stream_response",
+                        side_effect=RuntimeError("Model unavailable")):
+            events = self.stream()
+
+        self.assertEqual([event["event"] for event in events], ["start", "error"])
+        self.assertEqual(events[-1]["data"], {"message": "Model unavailable"})
+        self.assertEqual(list(ChatMessage.objects.values_list("sender", flat=True)), ["user"])
+
+    def test_requires_message(self):
+        response = self.client.post("/api/edu-buddy/chatbot/message/stream", {}, format="json")
+        self.assertEqual(response.status_code, 400)
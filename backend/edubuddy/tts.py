@@ -0,0 +1,252 @@
+import asyncio
+import io
+import os
+import re
+import threading
+import wave
+from contextlib import aclosing
+
+from django.conf import settings
+
+from .openai_clients import get_async_openai_client
+from .tts_cache import WAV_HEADER_SIZE
+
+TTS_MODEL = "gpt-4o-mini-tts"
+TTS_VOICE = "alloy"
+SAMPLE_RATE = 24000
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+|\n\s*\n")
+
+# Output formats clients can ask for, and what is requested from OpenAI for each.
+# wav is the raw 24 kHz 16-bit PCM behind a WAV header; mp3 is roughly 6x smaller.
+AUDIO_FORMATS = {
+    "wav": {"content_type": "audio/wav", "media_types": ("audio/wav", "audio/x-wav", "audio/wave"),
+            "response_format": "pcm"},
+    "mp3": {"content_type": "audio/mpeg", "media_types": ("audio/mpeg", "audio/mp3"), "response_format": "mp3"},
+}
+DEFAULT_AUDIO_FORMAT = "wav"
+PCM_BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+# Layer III bitrates in kbit/s by bitrate index, for MPEG-1 and MPEG-2/2.5
+MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+
+class AudioMetrics:
+    """Bytes and seconds of audio served per format, to compare the bandwidth they cost."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._formats = {}
+
+    def record(self, audio_format, bytes_sent, seconds, cached):
+        with self._lock:
+            metrics = self._formats.setdefault(audio_format, {
+                "requests": 0, "cache_hits": 0, "bytes": 0, "audio_seconds": 0.0,
+            })
+            metrics["requests"] += 1
+            metrics["cache_hits"] += int(cached)
+            metrics["bytes"] += bytes_sent
+            metrics["audio_seconds"] += seconds or 0.0
+
+    def stats(self):
+        with self._lock:
+            formats = {audio_format: dict(metrics) for audio_format, metrics in self._formats.items()}
+        for metrics in formats.values():
+            metrics["audio_seconds"] = round(metrics["audio_seconds"], 1)
+            metrics["bytes_per_audio_second"] = (
+                round(metrics["bytes"] / metrics["audio_seconds"]) if metrics["audio_seconds"] else None
+            )
+        return formats
+
+
+audio_metrics = AudioMetrics()
+
+
+def negotiate_audio_format(requested=None, accept=""):
+    """
+    Pick the output format from an explicit `format` value, else from the Accept header.
+
+    Media types are tried in the order the client listed them; anything unknown falls
+    back to wav. Returns None for an explicitly requested format we cannot produce.
+    """
+    if requested:
+        return requested if requested in AUDIO_FORMATS else None
+
+    for media_range in accept.split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        for audio_format, options in AUDIO_FORMATS.items():
+            if media_type in options["media_types"]:
+                return audio_format
+    return DEFAULT_AUDIO_FORMAT
+
+
+def mp3_bitrate(data):
+    """Bitrate in bit/s from the first MP3 frame header in `data`, skipping an ID3v2 tag."""
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        offset = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+
+    for i in range(offset, len(data) - 3):
+        if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+            continue
+        version = (data[i + 1] >> 3) & 0x03  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+        layer = (data[i + 1] >> 1) & 0x03  # 1 = Layer III
+        bitrate_index = data[i + 2] >> 4
+        if version == 1 or layer != 1 or bitrate_index in (0, 15):
+            continue
+        return MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    return None
+
+
+def audio_duration(audio_format, size, head=b""):
+    """
+    Seconds of audio in `size` bytes of a format; `head` is the start of the stream.
+
+    mp3 durations assume a constant bitrate, which is what OpenAI returns.
+    """
+    if audio_format == "wav":
+        return max(0, size - WAV_HEADER_SIZE) / PCM_BYTES_PER_SECOND
+    if audio_format == "mp3":
+        bitrate = mp3_bitrate(head)
+        return size * 8 / bitrate if bitrate else None
+    return None
+
+
+def audio_file_duration(path, audio_format):
+    with open(path, "rb") as audio_file:
+        head = audio_file.read(4096)
+    return audio_duration(audio_format, os.path.getsize(path), head)
+
+
+def split_tts_text(text, max_chars, first_max_chars=None):
+    """
+    Split text at sentence boundaries into segments of at most `max_chars`.
+
+    The first segment is kept shorter (`first_max_chars`) so the first audio arrives
+    quickly. Sentences longer than a segment are split at whitespace.
+    """
+    first_max_chars = first_max_chars or max(1, max_chars // 4)
+
+    sentences = []
+    for sentence in SENTENCE_END_RE.split(text.strip()):
+        sentence = " ".join(sentence.split())
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            sentences.append(sentence)
+
+    segments = []
+    current = ""
+    for sentence in sentences:
+        limit = first_max_chars if not segments else max_chars
+        if current and len(current) + 1 + len(sentence) > limit:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+async def synthesize_audio(text: str, instructions: str = None, response_format="pcm"):
+    """
+    Yield audio for `text` in an OpenAI `response_format`, however long the text is.
+
+    The text is split into sentence segments that are synthesized concurrently (at most
+    TTS_CONCURRENCY requests at a time), while the audio is yielded strictly in order:
+    the first segment streams straight through and later ones are buffered until it ends.
+    A segment buffers at most TTS_SEGMENT_BUFFER_CHUNKS chunks; when it gets that far ahead
+    its request waits, still holding its slot. Segments of raw PCM and of mp3 frames can
+    both simply be concatenated.
+    """
+    segments = split_tts_text(text, settings.TTS_SEGMENT_CHARS)
+    semaphore = asyncio.Semaphore(settings.TTS_CONCURRENCY)
+    queues = [asyncio.Queue(maxsize=settings.TTS_SEGMENT_BUFFER_CHUNKS) for _ in segments]
+
+    async def synthesize_segment(segment, queue):
+        try:
+            async with semaphore:
+                async with get_async_openai_client().audio.speech.with_streaming_response.create(
+                        model=TTS_MODEL,
+                        voice=TTS_VOICE,
+                        input=segment,
+                        instructions=instructions or "",
+                        response_format=response_format
+                ) as response:
+                    async for chunk in response.iter_bytes(4096):
+                        await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    # Tasks are created in order and the semaphore is FIFO, so leading segments start first
+    # and the segment being played always holds a slot while later ones wait on full queues
+    tasks = [asyncio.create_task(synthesize_segment(segment, queue)) for segment, queue in zip(segments, queues)]
+    try:
+        for queue in queues:
+            while (chunk := await queue.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def wav_header():
+    wav_buffer = io.BytesIO()
+    wav_file = wave.open(wav_buffer, 'wb')
+
+    wav_file.setnchannels(1)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(SAMPLE_RATE)
+
+    wav_file.writeframes(b'')
+
+    wav_buffer.seek(0)
+    header = wav_buffer.getvalue()
+    wav_buffer.close()
+    return header
+
+
+async def generate_audio_stream(text: str, instructions: str = None, cache_writer=None,
+                                audio_format=DEFAULT_AUDIO_FORMAT):
+    head = b""
+    bytes_sent = 0
+    completed = False
+    try:
+        if audio_format == "wav":
+            # The length is unknown while streaming; the cached copy gets the real sizes
+            head = wav_header()
+            if cache_writer is not None:
+                cache_writer.write(head)
+            bytes_sent += len(head)
+            yield head
+
+        response_format = AUDIO_FORMATS[audio_format]["response_format"]
+        async with aclosing(synthesize_audio(text, instructions, response_format)) as audio_stream:
+            async for chunk in audio_stream:
+                if cache_writer is not None:
+                    cache_writer.write(chunk)
+                if len(head) < 4096:
+                    head += chunk[:4096]
+                bytes_sent += len(chunk)
+                yield chunk
+        completed = True
+    finally:
+        # Only a complete synthesis is cached; a failure or a client that hung up discards it
+        if cache_writer is not None:
+            if completed:
+                cache_writer.commit()
+            else:
+                cache_writer.discard()
+        audio_metrics.record(audio_format, bytes_sent, audio_duration(audio_format, bytes_sent, head), cached=False)
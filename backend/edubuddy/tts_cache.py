@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+# Size of the header written by the `wave` module for 16-bit PCM
+WAV_HEADER_SIZE = 44
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Temporary files older than this were left by a stream that never finished
+PART_FILE_MAX_AGE = 60 * 60
+
+
+class TTSCache:
+    """
+    Content-addressed store of synthesized audio on local disk.
+
+    Files are named after a hash of everything that determines the audio, so a replayed
+    paragraph or chatbot answer is served from disk instead of being synthesized again.
+    The directory is kept under `max_bytes` by deleting the least recently used files;
+    hits bump a file's mtime. The size is tracked as entries are written and the directory
+    is only walked when it goes over the limit; eviction then goes down to 90% of it, so
+    the next writes do not walk it again. Writes by other processes are only seen on
+    such a walk.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+
+    @staticmethod
+    def make_key(text, voice, instructions, model, audio_format="wav"):
+        payload = json.dumps([text, voice, instructions or "", model, audio_format], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key, audio_format="wav"):
+        return os.path.join(self.directory, key[:2], f"{key}.{audio_format}")
+
+    def get(self, key, audio_format="wav"):
+        path = self.path(key, audio_format)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def writer(self, key, audio_format="wav"):
+        return CacheWriter(self, self.path(key, audio_format))
+
+    def record_write(self, size_delta):
+        """Account for an entry written (or replaced) and evict when over the limit."""
+        with self._lock:
+            if self._size is not None:
+                self._size += size_delta
+            over_limit = self._size is None or self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            files = []
+            stale_before = time.time() - PART_FILE_MAX_AGE
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                        if name.startswith("."):
+                            # Partially written files, unless their stream was abandoned
+                            if stat.st_mtime < stale_before:
+                                os.remove(path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            if total > self.max_bytes:
+                for _, size, path in sorted(files):
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    self.evictions += 1
+            self._size = total
+            return total
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class CacheWriter:
+    """
+    Fills one cache entry while the audio is streamed to the client.
+
+    Data goes to a hidden temporary file that is renamed into place by `commit()`, so a
+    synthesis that fails or a client that disconnects never leaves a truncated entry.
+    The file is only created on the first write, so a response that is never streamed
+    leaves nothing behind.
+    """
+
+    def __init__(self, cache, path):
+        self.cache = cache
+        self.path = path
+        self.temp_path = None
+        self.file = None
+
+    def write(self, data):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, self.temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".", suffix=".part")
+            self.file = os.fdopen(fd, "wb")
+        self.file.write(data)
+
+    def commit(self):
+        if self.file is None:
+            return
+        if self.path.endswith(".wav"):
+            fix_wav_header(self.file)
+        size = self.file.seek(0, os.SEEK_END)
+        self.file.close()
+
+        try:
+            replaced_size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(self.temp_path, self.path)
+        self.cache.record_write(size - replaced_size)
+
+    def discard(self):
+        if self.file is None:
+            return
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def fix_wav_header(file):
+    """Write the real RIFF and data chunk sizes into a WAV streamed with a zero-length header."""
+    size = file.seek(0, os.SEEK_END)
+    file.seek(4)
+    file.write(struct.pack("<I", size - 8))
+    file.seek(WAV_HEADER_SIZE - 4)
+    file.write(struct.pack("<I", size - WAV_HEADER_SIZE))
+    file.seek(0, os.SEEK_END)
+
+
+def range_file_response(request, path, content_type, headers=None):
+    """Serve a file, honouring a single `Range: bytes=start-end` request header."""
+    size = os.path.getsize(path)
+    headers = {"Accept-Ranges": "bytes", **(headers or {})}
+
+    match = RANGE_RE.match(request.headers.get("Range", "").strip())
+    if not match or match.groups() == ("", ""):
+        response = FileResponse(open(path, "rb"), content_type=content_type, headers=headers)
+        response["Content-Length"] = size
+        return response
+
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    else:
+        # bytes=-N is the last N bytes
+        start = max(0, size - int(end))
+        end = size - 1
+
+    if start >= size or start > end:
+        response = HttpResponse(status=416, headers=headers)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = open(path, "rb")
+    file.seek(start)
+    length = end - start + 1
+    response = StreamingHttpResponse(_read_range(file, length), status=206, content_type=content_type,
+                                     headers=headers)
+    response["Content-Length"] = length
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+def _read_range(file, length, chunk_size=64 * 1024):
+    try:
+        while length > 0:
+            data = file.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        file.close()
+
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """Return the process-wide cache, or None when TTS_CACHE_MAX_BYTES is 0."""
+    global _tts_cache
+    if not settings.TTS_CACHE_MAX_BYTES:
+        return None
+
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES)
+        return _tts_cache
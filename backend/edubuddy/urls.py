@@ -6,9 +6,15 @@ from .views import MaterialView, UpdateUserView, CategoryView, \
 
 urlpatterns = [
     path('chatbot/message', views.ChatbotMessageView.as_view(), name='chatbot_message'),
+    path('chatbot/message/stream', views.ChatbotMessageStreamView.as_view(), name='chatbot_message_stream'),
+    path('chatbot/message/async', views.ChatbotMessageAsyncView.as_view(), name='chatbot_message_async'),
     path('chatbot/messages/<int:conversation_id>', ChatMessagesView.as_view(), name='chatbot_messages'),
     path('chatbot/conversations', ConversationListView.as_view(), name='chatbot_conversations'),
+    path('chatbot/stats', views.ChatbotStatsView.as_view(), name='chatbot_stats'),
     path("tts", TextToSpeechView.as_view(), name="tts"),
+    path("tts/stats", views.TextToSpeechStatsView.as_view(), name="tts_stats"),
+    path("tts/<str:key>", views.TextToSpeechAudioView.as_view(), name="tts_audio"),
+    path('openai/stats', views.OpenAIStatsView.as_view(), name='openai_stats'),
     path('register', views.RegisterUserView.as_view(), name='register'),
     path('login', views.UserLoginView.as_view(), name='login'),
     path('logout', views.UserLogoutView.as_view(), name='logout'),
@@ -24,5 +30,6 @@ urlpatterns = [
     path("questions", GenerateQuestionsView.as_view(), name="question-list"),
     path('quizzes/<int:quiz_id>/download-result', DownloadQuizResultView.as_view(), name='download-quiz-result'),
     path('quizzes/results', QuizResultSummaryView.as_view(), name='quiz-results-summary'),
+    path('quizzes/results/export', views.QuizResultExportView.as_view(), name='quiz-results-export'),
     path('quiz-result/create', SaveQuizResultView.as_view(), name='quiz-results-create'),
 ]
@@ -0,0 +1,62 @@
+import hashlib
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+
+def spawn_pool(workers, initializer=None):
+    # spawn, because forking a process that already loaded torch can deadlock
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+    )
+
+
+def get_shared_pool(name, workers):
+    """Process pool kept for the life of this process, so requests do not pay for starting workers."""
+    with _shared_pools_lock:
+        if name not in _shared_pools:
+            _shared_pools[name] = spawn_pool(workers)
+        return _shared_pools[name]
+
+
+def ordered_results(items, submit, workers):
+    """
+    Yield (item, result) pairs in input order.
+
+    `submit(item)` returns either the result or a Future for it. At most two items per
+    worker are pending at a time, so memory stays bounded however many items there are.
+    Futures still pending when the caller stops early are cancelled.
+    """
+    window = max(1, workers) * 2
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, submit(item)))
+            while pending and (not isinstance(pending[0][1], Future) or len(pending) > window):
+                yield _resolve(*pending.popleft())
+
+        while pending:
+            yield _resolve(*pending.popleft())
+    finally:
+        for _, result in pending:
+            if isinstance(result, Future):
+                result.cancel()
+
+
+def _resolve(item, result):
+    return item, result.result() if isinstance(result, Future) else result
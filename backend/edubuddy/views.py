@@ -1,95 +1,169 @@
-import io
+import json
 import os
-import wave
-
-import pdfplumber
 import re
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ObjectDoesNotExist
-from openai import OpenAI, AsyncOpenAI
 
 from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.contrib.auth import authenticate
-from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 from dotenv import load_dotenv
 
-from pdf2image import convert_from_path
-from pytesseract import pytesseract
-from reportlab.lib.utils import simpleSplit
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
 from rest_framework import status
-from rest_framework.exceptions import NotFound, ValidationError, PermissionDenied
+from rest_framework.exceptions import NotFound, ValidationError, PermissionDenied, AuthenticationFailed
 from rest_framework.generics import get_object_or_404
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.views import APIView
 
+from knox.auth import TokenAuthentication
 from knox.models import AuthToken
 
-from backend import settings
 from .models import EduBuddyUser, Material, Quiz, Question, Category, Answer, QuizResult, QuestionResult, ChatMessage, \
     Conversation
 
 from .serializers import UserSerializer, MaterialSerializer, QuizSerializer, \
-    CategorySerializer, QuizResultSummarySerializer, ConversationSerializer, ChatMessageSerializer
-
-from edubuddy.management.commands.query_data import query_rag
-
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+    CategorySerializer, QuizResultSummarySerializer, ConversationSerializer, ChatMessageSerializer, \
+    ConversationSummarySerializer
+
+from edubuddy.management.commands.get_embedding_function import registry as vector_store_registry
+from edubuddy.management.commands.query_data import query_rag, stream_rag, aquery_rag
+from .ingestion import enqueue_material
+from .material_text import get_material_text
+from .openai_clients import get_openai_client, get_client_pool
+from .pagination import QuizResultCursorPagination
+from .quiz_export import EXPORT_FORMATS, export_queryset, get_render_executor, iter_csv, iter_zip
+from .quiz_report import build_report_data, open_quiz_report, report_filename
+from .semantic_cache import get_semantic_cache
+from .tts import TTS_MODEL, TTS_VOICE, AUDIO_FORMATS, audio_metrics, audio_file_duration, \
+    generate_audio_stream, negotiate_audio_format
+from .tts_cache import TTSCache, get_tts_cache, range_file_response
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
-async def generate_audio_stream(text: str, instructions: str = None):
-    wav_buffer = io.BytesIO()
-    wav_file = wave.open(wav_buffer, 'wb')
+class IsAdminRole(BasePermission):
+    """Users with the ADMIN role; is_staff is only used for the Django admin."""
 
-    sample_rate = 24000
-    wav_file.setnchannels(1)
-    wav_file.setsampwidth(2)
-    wav_file.setframerate(sample_rate)
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role.name == 'ADMIN')
 
-    wav_file.writeframes(b'')
 
-    wav_buffer.seek(0)
-    header = wav_buffer.getvalue()
-    wav_buffer.close()
+def _cached_audio_response(request, path, audio_format, headers):
+    response = range_file_response(request, path, AUDIO_FORMATS[audio_format]["content_type"], headers)
 
-    yield header
+    size = os.path.getsize(path)
+    duration = audio_file_duration(path, audio_format)
+    if duration is not None:
+        response["X-Audio-Duration"] = f"{duration:.2f}"
 
-    async with openai.audio.speech.with_streaming_response.create(
-            model="gpt-4o-mini-tts",
-            voice="alloy",
-            input=text,
-            instructions=instructions or "",
-            response_format="pcm"
-    ) as response:
-        async for chunk in response.iter_bytes(1024):
-            yield chunk
+    bytes_sent = int(response.get("Content-Length") or 0)
+    seconds = duration * bytes_sent / size if duration and size else None
+    audio_metrics.record(audio_format, bytes_sent, seconds, cached=True)
+    return response
 
 
 class TextToSpeechView(APIView):
     def post(self, request):
         text = request.data.get("text")
+        instructions = request.data.get("instructions") or ""
         if not text:
             return Response({"error": "Text is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        audio_stream = generate_audio_stream(text)
+        audio_format = negotiate_audio_format(request.data.get("format"), request.headers.get("Accept", ""))
+        if audio_format is None:
+            return Response({"error": f"Format must be one of: {', '.join(AUDIO_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = AUDIO_FORMATS[audio_format]["content_type"]
+        headers = {"Content-Disposition": f"inline; filename=tts.{audio_format}", "Vary": "Accept"}
+        cache = get_tts_cache()
+        if cache is None:
+            return StreamingHttpResponse(generate_audio_stream(text, instructions, audio_format=audio_format),
+                                         content_type=content_type, headers=headers)
+
+        key = TTSCache.make_key(text, TTS_VOICE, instructions, TTS_MODEL, audio_format)
+        headers["X-TTS-Key"] = key
+        path = cache.get(key, audio_format)
+        if path is not None:
+            return _cached_audio_response(request, path, audio_format, headers)
+
+        audio_stream = generate_audio_stream(text, instructions, cache.writer(key, audio_format), audio_format)
 
         return StreamingHttpResponse(
             audio_stream,
-            content_type="audio/wav",
-            headers={"Content-Disposition": "inline; filename=tts.wav"}
+            content_type=content_type,
+            headers=headers
         )
 
+    def perform_content_negotiation(self, request, force=False):
+        # Accept selects the audio format, so an audio-only Accept must not be rejected with a 406
+        return super().perform_content_negotiation(request, force=True)
+
+
+class TextToSpeechAudioView(APIView):
+    """Serve audio synthesized earlier by its X-TTS-Key, with Range support for seeking."""
+
+    def get(self, request, key):
+        cache = get_tts_cache()
+        if cache is None or not re.fullmatch(r"[0-9a-f]{64}", key):
+            raise NotFound("Audio not found.")
+
+        # The key already covers the format, so at most one of these files exists
+        for audio_format in AUDIO_FORMATS:
+            if os.path.exists(cache.path(key, audio_format)):
+                path = cache.get(key, audio_format)
+                if path is not None:
+                    headers = {"Content-Disposition": f"inline; filename=tts.{audio_format}"}
+                    return _cached_audio_response(request, path, audio_format, headers)
+        raise NotFound("Audio not found.")
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+
+class TextToSpeechStatsView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        cache = get_tts_cache()
+        return Response({
+            "formats": audio_metrics.stats(),
+            "cache": cache.stats() if cache is not None else None,
+        }, status=status.HTTP_200_OK)
+
+
+def save_user_message(user, conversation_id, message):
+    """
+    Store a student's chatbot message; returns (conversation, user message).
+
+    Continues the user's conversation `conversation_id`, or starts a new one without it.
+    Raises Conversation.DoesNotExist for a conversation of another user.
+    """
+    if conversation_id:
+        conversation = Conversation.objects.get(id=conversation_id, user=user)
+    else:
+        conversation = Conversation.objects.create(user=user)
+        conversation.title = f"Conversation - {conversation.id}"
+        conversation.save(update_fields=['title'])
+
+    user_message = ChatMessage.objects.create(
+        conversation=conversation,
+        sender='user',
+        message=message
+    )
+    return conversation, user_message
+
 
 class ChatbotMessageView(APIView):
     def post(self, request):
@@ -99,20 +173,10 @@ class ChatbotMessageView(APIView):
             user = request.user
 
             if user is not None and not isinstance(user, AnonymousUser) and user.is_authenticated:
-                if conversation_id:
-                    conversation = Conversation.objects.get(id=conversation_id, user=user)
-                else:
-                    conversation = Conversation.objects.create(user=user)
-                    conversation.title = f"Conversation - {conversation.id}"
-                    conversation.save()
-
-                ChatMessage.objects.create(
-                    conversation=conversation,
-                    sender='user',
-                    message=message
-                )
-
-            response = query_rag(message)
+                conversation, user_message = save_user_message(user, conversation_id, message)
+                response = query_rag(message, conversation, before_message_id=user_message.id)
+            else:
+                response = query_rag(message)
 
             if user is not None and not isinstance(user, AnonymousUser) and user.is_authenticated:
                 bot_message = ChatMessage.objects.create(
@@ -120,8 +184,10 @@ class ChatbotMessageView(APIView):
                     sender='bot',
                     message=response
                 )
-                serialized_message = ChatMessageSerializer(bot_message)
-                return Response({'message': serialized_message.data}, status=status.HTTP_200_OK)
+                return Response({
+                    'conversation': ConversationSummarySerializer(conversation).data,
+                    'message': ChatMessageSerializer(bot_message).data
+                }, status=status.HTTP_200_OK)
 
             return Response({
                 'message': {
@@ -137,6 +203,141 @@ class ChatbotMessageView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _sse_event(data, event=None):
+    payload = f"event: {event}\n" if event else ""
+    return payload + f"data: {json.dumps(data)}\n\n"
+
+
+class ChatbotMessageStreamView(APIView):
+    def post(self, request):
+        message = request.data.get('message')
+        conversation_id = request.data.get('conversation_id')
+        user = request.user
+
+        if not message:
+            return Response({"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        conversation = None
+        user_message = None
+        if user is not None and not isinstance(user, AnonymousUser) and user.is_authenticated:
+            try:
+                conversation, user_message = save_user_message(user, conversation_id, message)
+            except Conversation.DoesNotExist:
+                raise NotFound(detail="Conversation not found.")
+
+        response = StreamingHttpResponse(
+            self.event_stream(message, conversation, user_message),
+            content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def event_stream(self, message, conversation, user_message):
+        yield _sse_event({"conversation_id": conversation.id if conversation else None}, event="start")
+
+        tokens = []
+        try:
+            before_message_id = user_message.id if user_message else None
+            for token in stream_rag(message, conversation, before_message_id):
+                tokens.append(token)
+                yield _sse_event({"token": token})
+        except Exception as e:
+            yield _sse_event({"message": str(e)}, event="error")
+            return
+
+        response = "".join(tokens)
+
+        if conversation is not None:
+            bot_message = ChatMessage.objects.create(
+                conversation=conversation,
+                sender='bot',
+                message=response
+            )
+            yield _sse_event({
+                "conversation": ConversationSummarySerializer(conversation).data,
+                "message": ChatMessageSerializer(bot_message).data
+            }, event="done")
+        else:
+            yield _sse_event({"message": {"sender": "bot", "message": response}}, event="done")
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ChatbotMessageAsyncView(View):
+    """
+    Async version of ChatbotMessageView.
+
+    Served by an ASGI server, the request never holds a worker thread while waiting
+    on OpenAI, so one process can keep many tutoring requests in flight.
+    """
+
+    async def post(self, request):
+        try:
+            user = await self.authenticate(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST)
+
+        message = data.get('message')
+        conversation_id = data.get('conversation_id')
+        if not message:
+            return JsonResponse({"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if user is None:
+                response = await aquery_rag(message)
+                return JsonResponse({'message': {'sender': 'bot', 'message': response}}, status=status.HTTP_200_OK)
+
+            conversation, user_message = await sync_to_async(save_user_message)(user, conversation_id, message)
+            response = await aquery_rag(message, conversation, before_message_id=user_message.id)
+
+            bot_message = await ChatMessage.objects.acreate(
+                conversation=conversation,
+                sender='bot',
+                message=response
+            )
+            return JsonResponse({
+                'conversation': ConversationSummarySerializer(conversation).data,
+                'message': ChatMessageSerializer(bot_message).data
+            }, status=status.HTTP_200_OK)
+
+        except Conversation.DoesNotExist:
+            return JsonResponse({"error": "Conversation not found."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    async def authenticate(request):
+        """Knox token authentication; returns None for anonymous requests like the DRF views."""
+        result = await sync_to_async(TokenAuthentication().authenticate)(request)
+        return result[0] if result else None
+
+
+class ChatbotStatsView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        semantic_cache = get_semantic_cache()
+        return Response({
+            "vector_store": vector_store_registry.stats(),
+            "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        }, status=status.HTTP_200_OK)
+
+
+class OpenAIStatsView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        return Response(get_client_pool().stats(), status=status.HTTP_200_OK)
+
+
 class ConversationListView(APIView):
     def get(self, request):
         conversations = Conversation.objects.filter(user=request.user).order_by('-created_at')
@@ -147,22 +348,63 @@ class ConversationListView(APIView):
 
 
 class ChatMessagesView(APIView):
+    """
+    Messages of a conversation, oldest first, one page at a time.
+
+    Without parameters the latest page is returned. `before=<message id>` pages back
+    through older messages, `after=<message id>` pages forward and `since=<ISO timestamp>`
+    returns only messages newer than the given time. `has_more` tells whether there are
+    further messages in the direction that was paged.
+    """
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
+
     def get(self, request, conversation_id):
         try:
             conversation = Conversation.objects.get(id=conversation_id, user=request.user)
-            messages = conversation.messages.order_by('timestamp')
-            serializer = ChatMessageSerializer(messages, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return JsonResponse(
                 {"error": "Conversation not found or access denied."},
                 status=status.HTTP_404_NOT_FOUND
             )
-        except Exception as e:
-            return JsonResponse(
-                {"error": "An unexpected error occurred.", "details": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT))
+            before = request.query_params.get('before')
+            after = request.query_params.get('after')
+            since = request.query_params.get('since')
+
+            messages = conversation.messages.only('id', 'sender', 'message', 'timestamp')
+
+            if after or since:
+                if after:
+                    messages = messages.filter(id__gt=int(after))
+                else:
+                    since_timestamp = parse_datetime(since)
+                    if since_timestamp is None:
+                        raise ValueError(f"Invalid since timestamp: {since}")
+                    messages = messages.filter(timestamp__gt=since_timestamp)
+
+                page = list(messages.order_by('id')[:limit + 1])
+                has_more = len(page) > limit
+                page = page[:limit]
+            else:
+                if before:
+                    messages = messages.filter(id__lt=int(before))
+
+                page = list(messages.order_by('-id')[:limit + 1])
+                has_more = len(page) > limit
+                page = page[:limit][::-1]
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'conversation': ConversationSummarySerializer(conversation).data,
+            'messages': ChatMessageSerializer(page, many=True).data,
+            'has_more': has_more,
+            'first_id': page[0].id if page else None,
+            'last_id': page[-1].id if page else None,
+        }, status=status.HTTP_200_OK)
 
 
 class RegisterUserView(APIView):
@@ -297,16 +539,10 @@ class MaterialView(APIView):
 
         if serializer.is_valid():
             material = serializer.save(user=request.user)
+            enqueue_material(material)
+            material.refresh_from_db()
 
-            try:
-                call_command("create_database")
-
-                material.is_processed = True
-                material.save(update_fields=["is_processed"])
-            except Exception as e:
-                print(f"Failed to execute create_database command: {e}")
-
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(MaterialSerializer(material).data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -325,13 +561,16 @@ class MaterialView(APIView):
     def delete(self, request, material_id):
         try:
             material = Material.objects.get(pk=material_id)
+            file_path = material.file.path if material.file else None
 
-            if material.file and os.path.isfile(material.file.path):
-                os.remove(material.file.path)
-
+            # Delete the row first: a running ingestion job re-checks it after writing and
+            # cleans up its own chunks, so none survive whichever finishes last
             material.delete()
 
-            call_command("create_database", reset=True)
+            call_command("create_database", remove=material_id, source=file_path)
+
+            if file_path and os.path.isfile(file_path):
+                os.remove(file_path)
 
             return Response({
                 'message': 'Material deleted successfully.',
@@ -379,6 +618,8 @@ class UpdateUserView(APIView):
 
 
 class GenerateQuestionsView(APIView):
+    MAX_TEXT_LENGTH = 4000
+
     def post(self, request):
         difficulty = request.data.get('difficulty')
         material_id = request.data.get('material_id')
@@ -398,8 +639,7 @@ class GenerateQuestionsView(APIView):
         material = get_object_or_404(Material, id=material_id)
 
         try:
-            pdf_path = material.file.path
-            pdf_text = self.extract_pdf_text(pdf_path)
+            pdf_text = self.extract_material_text(material)
             if not pdf_text:
                 return Response(
                     {"error": "No text could be extracted from the PDF"},
@@ -411,61 +651,61 @@ class GenerateQuestionsView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        quiz = Quiz.objects.create(
-            title=f"Quiz for {material.file}",
-            description=f"Generated quiz for material {material.file} with {difficulty} difficulty",
-            user=request.user
-        )
-
         try:
             questions_data = self.generate_questions_with_ai(pdf_text, difficulty)
         except Exception as e:
-            quiz.delete()
             return Response(
                 {"error": f"Error generating questions: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        for q_data in questions_data:
-            question = Question.objects.create(
-                quiz=quiz,
-                text=q_data["text"],
-                difficulty=difficulty
-            )
-
-            for ans_data in q_data["answers"]:
-                Answer.objects.create(
-                    question=question,
-                    text=ans_data["text"],
-                    is_correct=ans_data["is_correct"]
-                )
+        quiz = self.save_quiz(material, difficulty, questions_data, request.user)
 
+        quiz = Quiz.objects.prefetch_related('questions__answers').get(pk=quiz.pk)
         serializer = QuizSerializer(quiz)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def extract_pdf_text(self, pdf_path):
-        text = ""
+    @transaction.atomic
+    def save_quiz(self, material, difficulty, questions_data, user):
+        quiz = Quiz.objects.create(
+            title=f"Quiz for {material.file}",
+            description=f"Generated quiz for material {material.file} with {difficulty} difficulty",
+            difficulty=difficulty,
+            user=user
+        )
+
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, text=q_data["text"], difficulty=difficulty)
+            for q_data in questions_data
+        ])
+        if any(question.pk is None for question in questions):
+            # Backends that cannot return ids from a bulk insert
+            questions = list(quiz.questions.order_by('id'))
+
+        answers = Answer.objects.bulk_create([
+            Answer(question=question, text=ans_data["text"], is_correct=ans_data["is_correct"])
+            for question, q_data in zip(questions, questions_data)
+            for ans_data in q_data["answers"]
+        ])
+
+        if any(answer.pk is None for answer in answers):
+            quiz.answer_key = quiz.build_answer_key()
+        else:
+            quiz.answer_key = Quiz.answer_key_from(
+                (answer.pk, answer.question_id, answer.text, answer.is_correct) for answer in answers
+            )
+        quiz.save(update_fields=['answer_key'])
+
+        return quiz
+
+    def extract_material_text(self, material):
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-
-            if not text.strip():
-                print("No text found with pdfplumber. Falling back to OCR...")
-                images = convert_from_path(pdf_path)
-                for image in images:
-                    page_text = pytesseract.image_to_string(image)
-                    if page_text:
-                        text += page_text + "\n"
-            return text.strip()
+            return get_material_text(material, max_chars=self.MAX_TEXT_LENGTH)
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
     def generate_questions_with_ai(self, pdf_text, difficulty):
-        max_text_length = 4000
-        truncated_text = pdf_text[:max_text_length]
+        truncated_text = pdf_text[:self.MAX_TEXT_LENGTH]
 
         if difficulty == "easy":
             question_types = ["basic comprehension", "definition", "simple fact"]
@@ -499,7 +739,7 @@ class GenerateQuestionsView(APIView):
             f"Ensure the response strictly follows the specified format with no additional text.\n"
         )
         try:
-            response = client.chat.completions.create(
+            response = get_openai_client().chat.completions.create(
                 model="gpt-4o",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.5,
@@ -574,83 +814,97 @@ class DownloadQuizResultView(APIView):
             return Response({"detail": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            quiz_result = QuizResult.objects.get(quiz=quiz, user=user)
+            quiz_result = QuizResult.objects.select_related('quiz', 'user').get(quiz=quiz, user=user)
         except QuizResult.DoesNotExist:
             return Response({"detail": "Quiz result not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        question_results = quiz_result.question_results.all()
-
-        correct = quiz_result.score
-        total = quiz_result.total_questions
-        result_rows = []
-
-        for question_result in question_results:
-            question_text = question_result.question.text
-            selected_answer = question_result.selected_answer
-            correct_answer = next((a for a in question_result.question.answers.all() if a.is_correct), None).text
-            result = "True" if question_result.is_correct else "False"
-
-            result_rows.append([question_text, selected_answer, correct_answer, result])
-
-        font_path = os.path.join(settings.BASE_DIR, 'fonts', 'DejaVuSans.ttf')
-        pdfmetrics.registerFont(TTFont('DejaVu', font_path))
-        bold_font_path = os.path.join(settings.BASE_DIR, 'fonts', 'DejaVuSans-Bold.ttf')
-        pdfmetrics.registerFont(TTFont('DejaVu-Bold', bold_font_path))
-
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        p.setFont("DejaVu-Bold", 11)
-        p.drawString(100, height - 50, f"Quiz Title: {quiz.title} {quiz.id}")
-        p.drawString(100, height - 70, f"User: {user.username}")
-        p.drawString(100, height - 90, f"Score: {correct} / {total}")
-        p.drawString(100, height - 120, "Results:")
-
-        p.setFont("DejaVu", 10)
-        y_position = height - 140
-
-        max_width = 400
+        def load_report_data():
+            # Only needed when the report is not cached yet
+            prefetch_related_objects([quiz_result], Prefetch(
+                'question_results',
+                queryset=QuestionResult.objects.select_related('question', 'selected_option').order_by('id')
+            ))
+            return build_report_data(quiz_result, quiz.get_answer_key())
+
+        report = open_quiz_report(quiz_result, load_report_data)
+        return FileResponse(report, as_attachment=True, filename=report_filename(quiz_result),
+                            content_type="application/pdf")
+
+
+def quiz_result_summaries():
+    """QuizResults with everything QuizResultSummarySerializer reads, in a constant number of queries."""
+    return QuizResult.objects.select_related('quiz').prefetch_related(
+        Prefetch(
+            'question_results',
+            queryset=QuestionResult.objects.select_related('question', 'selected_option').order_by('id')
+        )
+    )
 
-        def draw_wrapped_text(p, text, x, y, font_name, font_size, max_width):
-            lines = simpleSplit(text, font_name, font_size, max_width)
-            for line in lines:
-                p.drawString(x, y, line)
-                y -= font_size + 2
-            return y
 
-        for row in result_rows:
-            question_text = f"Question: {row[0]}"
-            selected_answer = f"Your Answer: {row[1]}"
-            correct_answer = f"Correct Answer: {row[2]}"
-            result = f"Result: {row[3]}"
+class QuizResultSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
 
-            for content in [question_text, selected_answer, correct_answer, result]:
-                y_position = draw_wrapped_text(p, content, 100, y_position, "DejaVu", 10, max_width)
+    def get(self, request):
+        results = quiz_result_summaries().filter(user=request.user)
 
-            y_position -= 20
+        paginator = QuizResultCursorPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = QuizResultSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
-            if y_position < 50:
-                p.showPage()
-                p.setFont("DejaVu", 10)
-                y_position = height - 50
 
-        p.showPage()
-        p.save()
+def _id_list(value):
+    try:
+        return [int(item) for item in value.split(",") if item.strip()] if value else None
+    except ValueError:
+        raise ValidationError({"detail": f"Invalid id list: {value}"})
 
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type="application/pdf")
-        response["Content-Disposition"] = f'attachment; filename="quiz_result_{quiz.title}.pdf"'
-        return response
 
+class QuizResultExportView(APIView):
+    """
+    Export quiz results as a ZIP of PDF reports or as one CSV.
 
-class QuizResultSummaryView(APIView):
+    Query parameters: output (zip or csv), users and quizzes (comma separated ids), and
+    from/to (YYYY-MM-DD, inclusive). Admins can export anyone's results, other users only
+    their own.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        results = QuizResult.objects.filter(user=request.user).select_related('quiz')
-        serializer = QuizResultSummarySerializer(results, many=True)
-        return Response(serializer.data)
+        output = request.query_params.get('output', 'zip')
+        if output not in EXPORT_FORMATS:
+            return Response({"detail": f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        dates = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            if value:
+                dates[param] = parse_date(value)
+                if dates[param] is None:
+                    return Response({"detail": f"Invalid date for '{param}', use YYYY-MM-DD."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+        user_ids = _id_list(request.query_params.get('users'))
+        if request.user.role.name != "ADMIN":
+            user_ids = [request.user.id]
+
+        results = export_queryset(
+            user_ids=user_ids,
+            quiz_ids=_id_list(request.query_params.get('quizzes')),
+            submitted_from=dates.get('from'),
+            submitted_to=dates.get('to'),
+        )
+
+        if output == 'csv':
+            return StreamingHttpResponse(iter_csv(results), content_type="text/csv", headers={
+                "Content-Disposition": 'attachment; filename="quiz_results.csv"'
+            })
+
+        archive = iter_zip(results, get_render_executor(), settings.QUIZ_EXPORT_WORKERS)
+        return StreamingHttpResponse(archive, content_type="application/zip", headers={
+            "Content-Disposition": 'attachment; filename="quiz_results.zip"'
+        })
 
 
 class SaveQuizResultView(APIView):
@@ -659,49 +913,52 @@ class SaveQuizResultView(APIView):
     def post(self, request, *args, **kwargs):
         quiz_id = request.data.get('quiz_id')
         question_results = request.data.get('question_results')
-        score = request.data.get('score')
         user = request.user
 
-        if not quiz_id or not question_results or score is None:
-            raise ValidationError("Quiz ID, Question Results, and Score are required.")
+        if not quiz_id or not question_results:
+            raise ValidationError("Quiz ID and Question Results are required.")
 
         try:
             quiz = Quiz.objects.get(id=quiz_id)
         except Quiz.DoesNotExist:
             raise ValidationError("Quiz not found.")
 
-        quiz_result = QuizResult.objects.create(
-            quiz=quiz,
-            score=score,
-            total_questions=len(question_results),
-            user_id=user.id
-        )
+        try:
+            selected_answers = {int(result['question_id']): int(result['answer_id']) for result in question_results}
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError("Each question result needs a question_id and an answer_id.")
 
-        question_result_instances = []
-        for result in question_results:
-            try:
-                question = Question.objects.get(id=result['question_id'])
-            except Question.DoesNotExist:
-                raise ValidationError(f"Question with ID {result['question_id']} not found.")
+        # Graded entirely against the quiz's answer key, the score sent by older clients is ignored
+        answer_key = quiz.get_answer_key()
 
-            try:
-                correct_answer = question.answers.get(is_correct=True)
-            except Answer.DoesNotExist:
-                raise ValidationError(f"No correct answer found for question ID {result['question_id']}.")
+        question_result_instances = []
+        for question_id, answer_id in selected_answers.items():
+            if question_id not in answer_key:
+                raise ValidationError(f"Question with ID {question_id} not found or has no correct answer.")
 
-            is_correct = result['selected_answer'] == correct_answer.text
+            if answer_id not in answer_key[question_id]["option_ids"]:
+                raise ValidationError(f"Answer with ID {answer_id} does not belong to question ID {question_id}.")
 
             question_result_instances.append(
                 QuestionResult(
-                    quiz_result=quiz_result,
-                    question=question,
-                    selected_answer=result['selected_answer'],
-                    is_correct=is_correct
+                    question_id=question_id,
+                    selected_option_id=answer_id,
+                    is_correct=answer_id == answer_key[question_id]["answer_id"]
                 )
             )
 
-        QuestionResult.objects.bulk_create(question_result_instances)
+        with transaction.atomic():
+            quiz_result = QuizResult.objects.create(
+                quiz=quiz,
+                score=sum(question_result.is_correct for question_result in question_result_instances),
+                total_questions=len(question_result_instances),
+                user_id=user.id
+            )
+
+            for question_result in question_result_instances:
+                question_result.quiz_result = quiz_result
+            QuestionResult.objects.bulk_create(question_result_instances)
 
-        quiz_result_summary = QuizResultSummarySerializer(quiz_result)
+        quiz_result_summary = QuizResultSummarySerializer(quiz_result_summaries().get(pk=quiz_result.pk))
 
         return Response(quiz_result_summary.data, status=status.HTTP_201_CREATED)
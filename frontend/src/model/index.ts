@@ -13,6 +13,8 @@ export type MaterialDto = {
   description: string;
   file: string;
   is_processed: boolean;
+  processing_status: "queued" | "running" | "done" | "failed";
+  processing_error: string;
   category: CategoryDto;
   uploaded_at: string;
   user: UserDto;
@@ -46,7 +48,9 @@ export type QuizDto = {
 
 export type QuestionResultDto = {
   question_id: number;
+  selected_answer_id: number | null;
   selected_answer: string;
+  is_correct: boolean;
   difficulty: string;
 };
 
@@ -61,6 +65,12 @@ export type QuizSummaryDto = {
   question_results: QuestionResultDto[];
 };
 
+export type CursorPage<T> = {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+};
+
 export type ConversationDto = {
   id: number;
   user: UserDto;
@@ -68,10 +78,28 @@ export type ConversationDto = {
   title: string;
 };
 
+export type ConversationSummaryDto = {
+  id: number;
+  title: string;
+  created_at: string;
+};
+
 export type ChatMessageDto = {
   id: number;
-  conversation: ConversationDto;
   sender: string;
   message: string;
   timestamp: string;
 };
+
+export type ChatReplyDto = {
+  conversation?: ConversationSummaryDto;
+  message: ChatMessageDto;
+};
+
+export type ChatHistoryDto = {
+  conversation: ConversationSummaryDto;
+  messages: ChatMessageDto[];
+  has_more: boolean;
+  first_id: number | null;
+  last_id: number | null;
+};
@@ -8,16 +8,31 @@ import { Sun, Moon, History, Plus, Send, View, Volume } from "lucide-react";
 import { useTheme } from "next-themes";
 import { Navbar } from "@/components/navbar";
 import {
-  createAnswer,
+  streamAnswer,
   fetchConversations,
   fetchMessagesForConversation,
   fetchTTS,
 } from "@/service/chatbot-service";
-import { ChatMessageDto, ConversationDto } from "@/model";
+import { ChatMessageDto, ChatReplyDto, ConversationDto } from "@/model";
 import toast from "react-hot-toast";
 import { LoadingSpinner } from "@/components/loading-spinner";
 import { useAuth } from "@/components/providers/auth-provider";
 
+const mapMessages = (chatMessages: ChatMessageDto[]) =>
+  chatMessages.reduce<{ user: string; bot: string }[]>((acc, curr) => {
+    if (curr.sender === "user") {
+      acc.push({ user: curr.message, bot: "" });
+    } else if (curr.sender === "bot") {
+      if (acc.length > 0 && !acc[acc.length - 1].bot) {
+        acc[acc.length - 1].bot = curr.message;
+      } else {
+        // The page started in the middle of an exchange
+        acc.push({ user: "", bot: curr.message });
+      }
+    }
+    return acc;
+  }, []);
+
 export default function Chatbot() {
   const auth = useAuth();
   const [messages, setMessages] = useState<{ user: string; bot: string }[]>([]);
@@ -35,6 +50,9 @@ export default function Chatbot() {
   const [isSpeaking, setIsSpeaking] = useState(false);
   const [isFetchingAudio, setIsFetchingAudio] = useState(false);
   const [isPlayingAudio, setIsPlayingAudio] = useState(false);
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState<
+    number | null
+  >(null);
 
   const { theme, setTheme } = useTheme();
   const timerRef = useRef<NodeJS.Timeout | null>(null);
@@ -77,22 +95,32 @@ export default function Chatbot() {
 
     try {
       const startTime = performance.now();
-      const response: ChatMessageDto = await createAnswer(
+      const response: ChatReplyDto = await streamAnswer(
         input,
-        selectedConversation
+        selectedConversation,
+        (token) => {
+          setBotThinking(false);
+          setMessages((prev) => {
+            const updated = [...prev];
+            const last = updated[updated.length - 1];
+            updated[updated.length - 1] = { ...last, bot: last.bot + token };
+            return updated;
+          });
+        }
       );
       const endTime = performance.now();
       const totalTime = ((endTime - startTime) / 1000).toFixed(2);
 
       clearInterval(timerRef.current!);
 
-      if (auth?.user) setSelectedConversation(response.conversation.id);
+      if (auth?.user && response.conversation)
+        setSelectedConversation(response.conversation.id);
 
       setMessages((prev) => {
         const updated = [...prev];
         updated[
           updated.length - 1
-        ].bot = `${response.message} (⏱ ${totalTime}s)`;
+        ].bot = `${response.message.message} (⏱ ${totalTime}s)`;
         return updated;
       });
     } catch (error) {
@@ -111,6 +139,7 @@ export default function Chatbot() {
 
   const startNewChat = () => {
     setMessages([]);
+    setOlderMessagesCursor(null);
     setInput("");
     setHistoryOpen(false);
     setSelectedConversation(null);
@@ -120,22 +149,11 @@ export default function Chatbot() {
     setMessages([]);
     setIsLoading(true);
     try {
-      const conversationMessages: ChatMessageDto[] =
-        await fetchMessagesForConversation(conversationId);
-
-      const mappedMessages = conversationMessages.reduce<
-        { user: string; bot: string }[]
-      >((acc, curr) => {
-        if (curr.sender === "user") {
-          acc.push({ user: curr.message, bot: "" });
-        } else if (curr.sender === "bot" && acc.length > 0) {
-          acc[acc.length - 1].bot = curr.message;
-        }
-        return acc;
-      }, []);
+      const history = await fetchMessagesForConversation(conversationId);
 
       setSelectedConversation(conversationId);
-      setMessages(mappedMessages);
+      setMessages(mapMessages(history.messages));
+      setOlderMessagesCursor(history.has_more ? history.first_id : null);
     } catch (error: any) {
       console.error("Error fetching messages", error);
       toast.error("Error fetching messages for this conversation!");
@@ -146,6 +164,23 @@ export default function Chatbot() {
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!selectedConversation || !olderMessagesCursor) return;
+
+    try {
+      const history = await fetchMessagesForConversation(
+        selectedConversation,
+        olderMessagesCursor
+      );
+
+      setMessages((prev) => [...mapMessages(history.messages), ...prev]);
+      setOlderMessagesCursor(history.has_more ? history.first_id : null);
+    } catch (error: any) {
+      console.error("Error fetching older messages", error);
+      toast.error("Error fetching older messages!");
+    }
+  };
+
   const handleTTS = async (text: string) => {
     setIsFetchingAudio(true);
     setIsSpeaking(true);
@@ -245,6 +280,13 @@ export default function Chatbot() {
         </div>
 
         <ScrollArea className="flex-1 p-4 rounded-lg space-y-4 overflow-y-auto bg-transparent scrollbar-hide">
+          {olderMessagesCursor && (
+            <div className="flex justify-center">
+              <Button variant="ghost" onClick={loadOlderMessages}>
+                Load earlier messages
+              </Button>
+            </div>
+          )}
           {messages.map((msg, index) => (
             <motion.div
               key={index}
@@ -26,7 +26,7 @@ export default function StartQuizPage() {
   const [difficulty, setDifficulty] = useState<string | null>(null);
   const [maxAnswerLength, setMaxAnswerLength] = useState(0);
   const [selectedAnswersMap, setSelectedAnswersMap] = useState<{
-    [key: number]: string;
+    [key: number]: number;
   }>({});
   const [createdQuiz, setCreatedQuiz] = useState<QuizDto | null>(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -89,7 +89,7 @@ export default function StartQuizPage() {
 
     const updatedAnswersMap = {
       ...selectedAnswersMap,
-      [questions[currentQuestionIndex].id]: answer.text,
+      [questions[currentQuestionIndex].id]: answer.id,
     };
 
     setSelectedAnswersMap(updatedAnswersMap);
@@ -109,7 +109,7 @@ export default function StartQuizPage() {
     }, 1000);
   };
 
-  const saveResults = async (answersMap: { [key: number]: string }) => {
+  const saveResults = async (answersMap: { [key: number]: number }) => {
     try {
       const quizId = createdQuiz?.id;
       if (!quizId) {
@@ -118,13 +118,13 @@ export default function StartQuizPage() {
       }
 
       const questionResults = Object.entries(answersMap).map(
-        ([question_id, selected_answer]) => ({
+        ([question_id, answer_id]) => ({
           question_id: Number(question_id),
-          selected_answer,
+          answer_id,
         })
       );
 
-      await saveQuizResult({ quizId, questionResults, score });
+      await saveQuizResult({ quizId, questionResults });
       toast.success("Quiz results saved!");
     } catch (error) {
       console.error("Error saving quiz results", error);
@@ -1,4 +1,5 @@
 import { DataTable } from "@/components/data-table";
+import { Button } from "@/components/ui/button";
 import { LoadingSpinner } from "@/components/loading-spinner";
 import { Navbar } from "@/components/navbar";
 import { QuizSummaryDto } from "@/model";
@@ -11,24 +12,33 @@ import { quizResultColumns } from "./quiz-columns";
 export default function ViewQuizzesPage() {
   const [summaries, setSummaries] = useState<QuizSummaryDto[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  useEffect(() => {
-    const fetchSummaries = async () => {
-      try {
-        const summaries = await fetchAllQuizResults();
+  const fetchSummaries = async (cursorUrl?: string | null) => {
+    try {
+      const page = await fetchAllQuizResults(cursorUrl);
 
-        setSummaries(summaries);
-      } catch (err) {
-        console.error("Failed to fetch quiz summaries", err);
-        toast.error("Error fetching all quiz summaries, try refreshing!");
-      } finally {
-        setLoading(false);
-      }
-    };
+      setSummaries((prev) =>
+        cursorUrl ? [...prev, ...page.results] : page.results
+      );
+      setNextPage(page.next);
+    } catch (err) {
+      console.error("Failed to fetch quiz summaries", err);
+      toast.error("Error fetching all quiz summaries, try refreshing!");
+    }
+  };
 
-    fetchSummaries();
+  useEffect(() => {
+    fetchSummaries().finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchSummaries(nextPage);
+    setLoadingMore(false);
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen min-w-screen flex flex-col items-center justify-start bg-gradient-to-br from-gray-900 via-gray-800 to-gray-900 text-white relative overflow-hidden px-4 sm:px-8 md:px-12 lg:px-20 pt-24 sm:pt-32">
@@ -84,6 +94,14 @@ export default function ViewQuizzesPage() {
             filterTitle="Search quiz..."
             canSearch={true}
           />
+
+          {nextPage && (
+            <div className="flex justify-center">
+              <Button onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load older quizzes"}
+              </Button>
+            </div>
+          )}
         </motion.div>
       </div>
     </div>
@@ -1,5 +1,7 @@
 import axiosInstance from "@/config/axiosInstance";
-import { ConversationDto } from "@/model";
+import { API_URL } from "@/config/config";
+import { ChatHistoryDto, ChatReplyDto, ConversationDto } from "@/model";
+import { getToken } from "@/utils/auth";
 
 export const createAnswer = async (
   message: string,
@@ -10,14 +12,63 @@ export const createAnswer = async (
       message,
       conversation_id: selectedConversation,
     });
-    console.log(response)
-    return response.data.message;
+    return response.data as ChatReplyDto;
   } catch (error: any) {
     console.error("Error creating answer", error);
     throw error;
   }
 };
 
+export const streamAnswer = async (
+  message: string,
+  selectedConversation: number | null,
+  onToken: (token: string) => void
+): Promise<ChatReplyDto> => {
+  const token = getToken();
+  const response = await fetch(`${API_URL}/chatbot/message/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...(token ? { Authorization: `Token ${token}` } : {}),
+    },
+    body: JSON.stringify({ message, conversation_id: selectedConversation }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Error streaming answer: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split("\n\n");
+    buffer = events.pop() ?? "";
+
+    for (const rawEvent of events) {
+      const lines = rawEvent.split("\n");
+      const event = lines
+        .find((line) => line.startsWith("event: "))
+        ?.slice("event: ".length);
+      const data = JSON.parse(
+        lines.find((line) => line.startsWith("data: "))?.slice("data: ".length) ??
+          "{}"
+      );
+
+      if (event === "error") throw new Error(data.message);
+      if (event === "done") return data;
+      if (!event) onToken(data.token);
+    }
+  }
+
+  throw new Error("Answer stream ended unexpectedly");
+};
+
 export const fetchMessages = async (conversation_id: number) => {
   try {
     const response = await axiosInstance.get(
@@ -40,10 +91,14 @@ export const fetchConversations = async (): Promise<ConversationDto[]> => {
   }
 };
 
-export const fetchMessagesForConversation = async (conversation_id: number) => {
+export const fetchMessagesForConversation = async (
+  conversation_id: number,
+  before?: number | null
+): Promise<ChatHistoryDto> => {
   try {
     const response = await axiosInstance.get(
-      `/chatbot/messages/${conversation_id}`
+      `/chatbot/messages/${conversation_id}`,
+      { params: before ? { before } : {} }
     );
     return response.data;
   } catch (error) {
@@ -52,11 +107,11 @@ export const fetchMessagesForConversation = async (conversation_id: number) => {
   }
 };
 
-export const fetchTTS = async (text: string) => {
+export const fetchTTS = async (text: string, format: "mp3" | "wav" = "mp3") => {
   try {
     const response = await axiosInstance.post(
       `/tts`,
-      { text },
+      { text, format },
       {
         responseType: "blob",
       }
@@ -1,4 +1,5 @@
 import axiosInstance from "@/config/axiosInstance";
+import { CursorPage, QuizSummaryDto } from "@/model";
 
 export const generateQuestions = async ({
   difficulty,
@@ -34,9 +35,11 @@ export const downloadQuizResult = async ({ quizId }: { quizId: number }) => {
   }
 };
 
-export const fetchAllQuizResults = async () => {
+export const fetchAllQuizResults = async (
+  cursorUrl?: string | null
+): Promise<CursorPage<QuizSummaryDto>> => {
   try {
-    const response = await axiosInstance.get("quizzes/results");
+    const response = await axiosInstance.get(cursorUrl ?? "quizzes/results");
     return response.data;
   } catch (error: any) {
     console.error("Error fetching all quiz results", error);
@@ -47,16 +50,13 @@ export const fetchAllQuizResults = async () => {
 export const saveQuizResult = async ({
   quizId,
   questionResults,
-  score,
 }: {
   quizId: number;
-  questionResults: { question_id: number; selected_answer: string }[];
-  score: number;
+  questionResults: { question_id: number; answer_id: number }[];
 }) => {
   try {
     const response = await axiosInstance.post("quiz-result/create", {
       quiz_id: quizId,
-      score: score,
       question_results: questionResults,
     });
 